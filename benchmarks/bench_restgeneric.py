@@ -0,0 +1,305 @@
+"""
+Benchmarks of RestGeneric hot paths.
+
+Request keywords run against an in-process stub server (Refer: rest_stub), data keywords against
+generated payloads and workbooks, so results only depend on the machine and the library code.
+
+Every benchmark is calibrated to run at least --min-time seconds per repeat and reports the median
+and minimum time per operation. Results are written as JSON and can be compared with a baseline
+from an earlier run, e.g.
+    python benchmarks/bench_restgeneric.py --save-baseline baseline.json
+    python benchmarks/bench_restgeneric.py --baseline baseline.json --output results.json
+
+Exit status is 1 if any benchmark median is slower than its baseline by more than --threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'lib', 'rest_util'))
+
+from RestGeneric import RestGeneric  # noqa: E402
+from rest_data_source import cache as data_cache  # noqa: E402
+
+BENCHMARKS = []
+DEFAULT_THRESHOLD = 0.2
+
+
+def benchmark(name):
+    """
+    Registers setup function `func(context)` returning the callable to time
+    """
+    def register(func):
+        BENCHMARKS.append((name, func))
+        return func
+    return register
+
+
+def _user(user_id):
+    return {'id': user_id, 'name': 'User {}'.format(user_id), 'email': 'user{}@example.com'.format(user_id),
+            'gender': 'Male' if user_id % 2 else 'Female', 'status': 'Active' if user_id % 3 else 'Inactive',
+            'address': {'city': 'City {}'.format(user_id % 50), 'zip': '{:05d}'.format(user_id % 99999)},
+            'scores': [user_id % 7, user_id % 11, user_id % 13]}
+
+
+def users_payload(count):
+    return {'code': 200, 'meta': {'pagination': {'total': count, 'pages': 1, 'page': 1, 'limit': count}},
+            'data': [_user(user_id) for user_id in range(count)]}
+
+
+def deep_document(depth, width):
+    document = {'value': depth}
+    for level in range(depth):
+        document = {'level': level, 'items': [dict(document, position=position) for position in range(width)]
+                    if level < 2 else [], 'child': document}
+    return document
+
+
+class Context(object):
+
+    def __init__(self, quick):
+        self.quick = quick
+        self.temp_dir = tempfile.mkdtemp(prefix='restgeneric-bench-')
+        self.small_users = users_payload(10)
+        self.large_users = users_payload(2000 if quick else 20000)
+        self.small_json = json.dumps(self.small_users)
+        self.large_json = json.dumps(self.large_users)
+        self.base_url = RestGeneric.start_stub_server(self.small_json)
+        self._excel_file = None
+
+    @property
+    def excel_file(self):
+        if self._excel_file is None:
+            import pandas as pd
+
+            rows = 2000 if self.quick else 20000
+            frame = pd.DataFrame({
+                'TC_ID': ['TC_{}'.format(row) for row in range(rows)],
+                'Description': ['Get user {}'.format(row) for row in range(rows)],
+                'Endpoint': ['users'] * rows,
+                'Expected': ['200'] * rows,
+                'id': [str(row) for row in range(rows)],
+                'status': ['Active' if row % 3 else None for row in range(rows)],
+                'page': [str(row % 10) if row % 2 else None for row in range(rows)],
+            })
+            self._excel_file = os.path.join(self.temp_dir, 'test_cases.xlsx')
+            frame.to_excel(self._excel_file, sheet_name='Users', index=False)
+        return self._excel_file
+
+    def close(self):
+        RestGeneric.stop_stub_server(self.base_url)
+        RestGeneric.close_all_http_sessions()
+        if self._excel_file is not None:
+            os.remove(self._excel_file)
+        os.rmdir(self.temp_dir)
+
+
+@benchmark('execute_get_request')
+def bench_get(context):
+    url = context.base_url + 'users'
+    return lambda: RestGeneric.execute_get_request(url)
+
+
+@benchmark('execute_post_request')
+def bench_post(context):
+    url = context.base_url + 'users'
+    body = json.dumps(_user(1))
+    return lambda: RestGeneric.execute_post_request(url, body, None, 'token', 'Authorization')
+
+
+@benchmark('execute_put_request')
+def bench_put(context):
+    url = context.base_url + 'users/1'
+    body = json.dumps(_user(1))
+    return lambda: RestGeneric.execute_put_request(url, body, None, 'token', 'Authorization')
+
+
+@benchmark('execute_patch_request')
+def bench_patch(context):
+    url = context.base_url + 'users/1'
+    body = json.dumps({'status': 'Inactive'})
+    return lambda: RestGeneric.execute_patch_request(url, body, None, 'token', 'Authorization')
+
+
+@benchmark('execute_delete_request')
+def bench_delete(context):
+    url = context.base_url + 'users/1'
+    return lambda: RestGeneric.execute_delete_request(url, None, 'token', 'Authorization')
+
+
+@benchmark('load_json_small')
+def bench_load_json_small(context):
+    return lambda: RestGeneric.load_json(context.small_json)
+
+
+@benchmark('load_json_large')
+def bench_load_json_large(context):
+    return lambda: RestGeneric.load_json(context.large_json)
+
+
+@benchmark('get_value_by_key_from_json_small')
+def bench_get_value_small(context):
+    return lambda: RestGeneric.get_value_by_key_from_json(context.small_users, 'data.9.address.city')
+
+
+@benchmark('get_value_by_key_from_json_large')
+def bench_get_value_large(context):
+    key_path = 'data.{}.address.city'.format(len(context.large_users['data']) - 1)
+    return lambda: RestGeneric.get_value_by_key_from_json(context.large_users, key_path)
+
+
+@benchmark('get_value_by_key_from_json_large_string')
+def bench_get_value_large_string(context):
+    return lambda: RestGeneric.get_value_by_key_from_json(context.large_json, 'meta.pagination.total')
+
+
+@benchmark('validate_json_deep')
+def bench_validate_deep(context):
+    reference = deep_document(60 if context.quick else 200, 3)
+    document = json.loads(json.dumps(reference))
+    rest_generic = RestGeneric()
+    return lambda: rest_generic.validate_json(document, reference)
+
+
+@benchmark('validate_json_wide')
+def bench_validate_wide(context):
+    reference = context.large_users
+    document = json.loads(context.large_json)
+    document['data'][-1]['status'] = 'Changed'
+    rest_generic = RestGeneric()
+    return lambda: rest_generic.validate_json(document, reference, 'email')
+
+
+@benchmark('get_filtered_object_list')
+def bench_filter(context):
+    users = context.large_users['data']
+    return lambda: RestGeneric.get_filtered_object_list(users, **{'status': 'Active', 'address.city': 'City 7'})
+
+
+@benchmark('get_filtered_object_list_indexed')
+def bench_filter_indexed(context):
+    index = RestGeneric.build_json_index(context.large_users['data'], 'status', 'address.city')
+    return lambda: RestGeneric.get_filtered_object_list(index, **{'status': 'Active', 'address.city': 'City 7'})
+
+
+@benchmark('generate_rest_urls_from_excel')
+def bench_excel_urls(context):
+    excel_file = context.excel_file
+
+    def run():
+        data_cache.clear()
+        return RestGeneric.generate_rest_urls_from_excel(context.base_url, excel_file, 'Users')
+    return run
+
+
+@benchmark('generate_rest_urls_from_excel_cached')
+def bench_excel_urls_cached(context):
+    excel_file = context.excel_file
+    RestGeneric.generate_rest_urls_from_excel(context.base_url, excel_file, 'Users')
+    return lambda: RestGeneric.generate_rest_urls_from_excel(context.base_url, excel_file, 'Users')
+
+
+def measure(func, min_time, repeat):
+    """
+    Returns seconds per call of `func` for `repeat` rounds of at least `min_time` seconds each
+    """
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops = max(loops * 2, int(loops * min_time / max(elapsed, 1e-9)))
+    timings = [elapsed / loops]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        timings.append((time.perf_counter() - started) / loops)
+    return loops, timings
+
+
+def run_benchmarks(selected=None, quick=False, min_time=0.2, repeat=5):
+    context = Context(quick)
+    results = {}
+    try:
+        for name, setup in BENCHMARKS:
+            if selected and not any(pattern in name for pattern in selected):
+                continue
+            loops, timings = measure(setup(context), min_time, repeat)
+            results[name] = {'median': statistics.median(timings), 'min': min(timings), 'loops': loops,
+                             'repeat': repeat}
+            print('{:<45} {:>14} {:>14}'.format(name, format_seconds(results[name]['median']),
+                                                format_seconds(results[name]['min'])))
+    finally:
+        context.close()
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Returns {name: ratio} of benchmarks whose median is slower than baseline by more than `threshold`
+    """
+    regressions = {}
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        ratio = result['median'] / reference['median']
+        if ratio > 1 + threshold:
+            regressions[name] = ratio
+    return regressions
+
+
+def format_seconds(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return '{:.3f} {}'.format(seconds / scale, unit)
+    return '{:.1f} ns'.format(seconds / 1e-9)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark RestGeneric hot paths')
+    parser.add_argument('--filter', action='append', help='Run only benchmarks whose name contains this text')
+    parser.add_argument('--quick', action='store_true', help='Smaller payloads and sheets')
+    parser.add_argument('--min-time', type=float, default=0.2, help='Minimum seconds per repeat')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--baseline', help='Compare with results JSON of an earlier run')
+    parser.add_argument('--save-baseline', help='Write results JSON to this file for later comparison')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Allowed relative slowdown of median against baseline (Default: 0.2)')
+    args = parser.parse_args(argv)
+
+    print('{:<45} {:>14} {:>14}'.format('benchmark', 'median', 'min'))
+    results = run_benchmarks(args.filter, args.quick, args.min_time, args.repeat)
+    report = {'python': platform.python_version(), 'platform': platform.platform(), 'quick': args.quick,
+              'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results': results}
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as output:
+                json.dump(report, output, indent=2)
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    if baseline.get('quick') != args.quick:
+        print('Warning: baseline was recorded with quick={}'.format(baseline.get('quick')))
+    regressions = compare(results, baseline['results'], args.threshold)
+    for name, ratio in sorted(regressions.items()):
+        print('REGRESSION {:<34} {:.2f}x baseline median'.format(name, ratio))
+    if not regressions:
+        print('No regressions against {} (threshold {:.0%})'.format(args.baseline, args.threshold))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
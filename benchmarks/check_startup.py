@@ -0,0 +1,93 @@
+"""
+Startup budget check of the RestGeneric library.
+
+Imports the library in fresh interpreters (with Robot Framework already loaded, as in a Robot or
+pabot worker) and fails if the median import time or resident memory growth exceeds the budget,
+or if modules that must only be loaded on first use (eg. pandas) are imported, e.g.
+    python benchmarks/check_startup.py --max-seconds 0.25 --max-rss-mb 30
+The check also runs as test case of tests/library_checks.robot. Memory is measured with the
+resource module, which is not available on Windows, where only import time and lazy modules are checked.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+LIBRARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'lib', 'rest_util')
+LAZY_MODULES = ('pandas', 'openpyxl', 'numpy', 'multiprocessing', 'six')
+
+_PROBE = """
+import json
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, memory is not measured there
+    resource = None
+
+
+def max_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, in kilobytes elsewhere
+    return rss / 1048576.0 if sys.platform == 'darwin' else rss / 1024.0
+
+
+import robot.api
+rss_before = max_rss_mb()
+started = time.perf_counter()
+sys.path.insert(0, {library_dir!r})
+import RestGeneric
+seconds = time.perf_counter() - started
+rss_after = max_rss_mb()
+print(json.dumps({{'seconds': seconds, 'rss_mb': None if rss_before is None else rss_after - rss_before,
+                  'loaded': [name for name in {lazy_modules!r} if name in sys.modules]}}))
+"""
+
+
+def measure_startup(runs=5):
+    """
+    Returns list of {'seconds', 'rss_mb', 'loaded'} of `runs` imports in fresh interpreters
+    """
+    probe = _PROBE.format(library_dir=os.path.abspath(LIBRARY_DIR), lazy_modules=LAZY_MODULES)
+    samples = []
+    for _ in range(int(runs)):
+        output = subprocess.check_output([sys.executable, '-c', probe])
+        samples.append(json.loads(output.decode('utf-8').strip().splitlines()[-1]))
+    return samples
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check RestGeneric import time and memory budget')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-seconds', type=float, default=0.25, help='Median import time budget')
+    parser.add_argument('--max-rss-mb', type=float, default=30.0, help='Median resident memory growth budget')
+    args = parser.parse_args(argv)
+
+    samples = measure_startup(args.runs)
+    seconds = statistics.median(sample['seconds'] for sample in samples)
+    rss_samples = [sample['rss_mb'] for sample in samples if sample['rss_mb'] is not None]
+    rss_mb = statistics.median(rss_samples) if rss_samples else None
+    loaded = sorted(set(name for sample in samples for name in sample['loaded']))
+    print('import time {:.3f} s (budget {:.3f} s), rss growth {} (budget {:.1f} MB)'.format(
+        seconds, args.max_seconds, 'not measured' if rss_mb is None else '{:.1f} MB'.format(rss_mb),
+        args.max_rss_mb))
+    failures = []
+    if seconds > args.max_seconds:
+        failures.append('import time over budget')
+    if rss_mb is not None and rss_mb > args.max_rss_mb:
+        failures.append('memory over budget')
+    if loaded:
+        failures.append('modules loaded at import time: {}'.format(', '.join(loaded)))
+    for failure in failures:
+        print('FAIL {}'.format(failure))
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,451 @@
+"""
+Incremental compiler of gherkin feature files into Robot Framework suites.
+
+Every feature file is compiled into a test suite (test_<feature name>.robot) and a step definition
+file (test_<feature name>_step_definitions.robot) next to it, in the same layout as
+gherkin2robotframework. Unlike a full regeneration:
+    - features whose content did not change since the last run are skipped, using a persistent
+      cache of file and scenario hashes (.feature_cache.json in the output directory)
+    - in a changed feature only test cases of new or changed scenarios are rewritten, unchanged
+      test cases and all settings other than the feature documentation are kept as they are
+    - step definition keywords that already exist are never touched, skeletons are appended for
+      new steps only
+
+Usage:
+    python lib/gherkin_util/feature_compiler.py tests/
+    python lib/gherkin_util/feature_compiler.py tests/user.feature --output-dir build/suites --force
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+
+CACHE_FILE_NAME = '.feature_cache.json'
+CACHE_VERSION = 1
+STEP_PREFIXES = ('Given', 'When', 'Then', 'And', 'But')
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+DEFAULT_RESOURCE = os.path.join(PROJECT_DIR, 'resources', 'apiResources.robot')
+DEFAULT_LIBRARY = os.path.join(PROJECT_DIR, 'lib', 'rest_util', 'RestGeneric.py')
+SKELETON_BODY = '    Fail    Step not implemented'
+
+_SECTION = re.compile(r'^\*+\s*(settings?|variables?|test cases?|tasks?|keywords?|comments?)\s*\**\s*$', re.IGNORECASE)
+_OUTLINE_PARAMETER = re.compile(r'<([^<>]+)>')
+
+
+class FeatureSyntaxError(ValueError):
+    pass
+
+
+class Scenario(object):
+    __slots__ = ('name', 'tags', 'steps')
+
+    def __init__(self, name, tags, steps):
+        self.name = name
+        self.tags = tags
+        self.steps = steps
+
+    def digest(self):
+        return _sha1(json.dumps([self.name, self.tags, self.steps]))
+
+
+class Feature(object):
+    __slots__ = ('name', 'description', 'tags', 'scenarios')
+
+    def __init__(self, name, description, tags, scenarios):
+        self.name = name
+        self.description = description
+        self.tags = tags
+        self.scenarios = scenarios
+
+    @property
+    def suite_name(self):
+        name = self.name.lower().replace(' ', '_')
+        return name if name.startswith('test') else 'test_' + name
+
+
+def _sha1(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def parse_feature(text, source='<feature>'):
+    """
+    Parses gherkin `text` into a Feature
+
+    Background steps are prepended to every scenario, a scenario outline becomes one scenario per
+    examples row with <parameters> substituted. Doc strings and data tables are not supported.
+    """
+    name = None
+    description = []
+    feature_tags = []
+    pending_tags = []
+    background = None
+    scenarios = []
+    current = None
+    outline = None
+    header = None
+    in_examples = False
+    for line_number, raw_line in enumerate(text.splitlines(), 1):
+        line = raw_line.strip()
+        if not line or line.startswith('#'):
+            continue
+        keyword, _, rest = line.partition(':')
+        keyword = keyword.strip()
+        if line.startswith('@'):
+            pending_tags.extend(tag[1:] for tag in line.split() if tag.startswith('@'))
+        elif keyword == 'Feature' and name is None:
+            name, feature_tags, pending_tags = rest.strip(), pending_tags, []
+        elif keyword == 'Background':
+            background = current = []
+            outline = None
+            in_examples = False
+        elif keyword in ('Scenario', 'Example', 'Scenario Outline', 'Scenario Template'):
+            current = []
+            in_examples = False
+            if keyword in ('Scenario', 'Example'):
+                scenarios.append(Scenario(rest.strip(), pending_tags, current))
+                outline = None
+            else:
+                outline = {'name': rest.strip(), 'tags': pending_tags, 'steps': current}
+            pending_tags = []
+        elif keyword in ('Examples', 'Scenarios'):
+            if outline is None:
+                raise FeatureSyntaxError('{}:{}: Examples outside scenario outline'.format(source, line_number))
+            header = None
+            in_examples = True
+        elif line.startswith('|') and in_examples:
+            cells = [cell.strip() for cell in line.strip('|').split('|')]
+            if header is None:
+                header = cells
+                continue
+            values = dict(zip(header, cells))
+
+            def substitute(template):
+                return _OUTLINE_PARAMETER.sub(lambda match: values.get(match.group(1), match.group(0)), template)
+
+            scenario_name = substitute(outline['name'])
+            if scenario_name == outline['name']:
+                scenario_name = '{} ({})'.format(outline['name'], ', '.join(cells))
+            scenarios.append(Scenario(scenario_name, outline['tags'], [substitute(step) for step in outline['steps']]))
+        elif line.split(None, 1)[0] in STEP_PREFIXES + ('*',):
+            if current is None:
+                raise FeatureSyntaxError('{}:{}: Step outside scenario'.format(source, line_number))
+            step_keyword, _, step_text = line.partition(' ')
+            current.append(step_text.strip() if step_keyword == '*' else '{} {}'.format(step_keyword, step_text.strip()))
+        elif line.startswith('"""') or line.startswith('```') or line.startswith('|'):
+            raise FeatureSyntaxError('{}:{}: Doc strings and data tables are not supported'.format(source, line_number))
+        elif name is not None and current is None:
+            description.append(line)
+        else:
+            raise FeatureSyntaxError('{}:{}: Unexpected line: {}'.format(source, line_number, line))
+    if name is None:
+        raise FeatureSyntaxError('{}: No Feature found'.format(source))
+    if background:
+        for scenario in scenarios:
+            scenario.steps = background + scenario.steps
+    return Feature(name, ' '.join(description), feature_tags, scenarios)
+
+
+def keyword_name(step):
+    """
+    Returns step text without gherkin prefix, the way Robot Framework matches it to a keyword
+    """
+    first, _, rest = step.partition(' ')
+    return rest if first in STEP_PREFIXES and rest else step
+
+
+def normalize_keyword(name):
+    return re.sub(r'[\s_]+', '', name).lower()
+
+
+def split_sections(text):
+    """
+    Splits robot file `text` into [(section header line or None, [lines])]
+    """
+    sections = [(None, [])]
+    for line in text.splitlines():
+        if _SECTION.match(line):
+            sections.append((line, []))
+        else:
+            sections[-1][1].append(line)
+    return sections
+
+
+def split_items(lines):
+    """
+    Splits test case or keyword section `lines` into [(name, [lines])], lines before the first item
+    have name None
+    """
+    items = [(None, [])]
+    for line in lines:
+        if line and not line[0].isspace() and not line.startswith('#'):
+            items.append((line.split('    ')[0].rstrip(), [line]))
+        else:
+            items[-1][1].append(line)
+    return items
+
+
+def _setting(name, *values):
+    return '{:<18}{}'.format(name, '    '.join(values))
+
+
+def _relative(path, directory):
+    return os.path.relpath(path, directory).replace(os.sep, '/')
+
+
+def render_test_case(scenario):
+    lines = [scenario.name]
+    if scenario.tags:
+        lines.append('    [Tags]    ' + '    '.join(scenario.tags))
+    lines.extend('    ' + step for step in scenario.steps)
+    lines.append('')
+    return lines
+
+
+def render_suite_settings(feature, step_definitions_file, resource_file):
+    settings = [_setting('Documentation', feature.description)] if feature.description else []
+    settings.append(_setting('Metadata', 'Feature', feature.name))
+    settings.append(_setting('Metadata', 'Generated by', '_feature_compiler on {}_'.format(
+        time.strftime('%Y-%m-%dT%H:%M:%S'))))
+    if feature.tags:
+        settings.append(_setting('Force Tags', *feature.tags))
+    settings.append(_setting('Resource', './' + step_definitions_file))
+    settings.append(_setting('Resource', resource_file))
+    return settings
+
+
+def update_suite_settings(lines, feature):
+    """
+    Updates Documentation and Metadata Feature of existing settings `lines`, keeping everything else
+    """
+    updated = []
+    for line in lines:
+        if line.startswith('Documentation'):
+            if feature.description:
+                updated.append(_setting('Documentation', feature.description))
+        elif re.match(r'^Metadata\s+Feature\s', line):
+            updated.append(_setting('Metadata', 'Feature', feature.name))
+        else:
+            updated.append(line)
+    if feature.description and not any(line.startswith('Documentation') for line in updated):
+        updated.insert(0, _setting('Documentation', feature.description))
+    return updated
+
+
+def build_suite(feature, existing_text, cached_scenarios, step_definitions_file, resource_file):
+    """
+    Returns (suite text, regenerated scenario names) keeping unchanged test cases of `existing_text`
+    """
+    sections = split_sections(existing_text) if existing_text else []
+    settings = next((lines for header, lines in sections if header and 'setting' in header.lower()), None)
+    test_lines = next((lines for header, lines in sections if header and 'test case' in header.lower()), [])
+    existing_tests = dict(split_items(test_lines)[1:])
+    if settings is None:
+        settings = render_suite_settings(feature, step_definitions_file, resource_file) + ['']
+    else:
+        settings = update_suite_settings(settings, feature)
+
+    regenerated = []
+    tests = []
+    for scenario in feature.scenarios:
+        block = existing_tests.get(scenario.name)
+        if block is None or cached_scenarios.get(scenario.name) != scenario.digest():
+            block = render_test_case(scenario)
+            regenerated.append(scenario.name)
+        tests.extend(block)
+
+    output = ['*** Settings ***'] + settings
+    for header, lines in sections:
+        if header is not None and 'setting' not in header.lower() and 'test case' not in header.lower():
+            output.append(header)
+            output.extend(lines)
+    output.append('*** Test Cases ***')
+    output.extend(tests)
+    while output and not output[-1]:
+        output.pop()
+    return '\n'.join(output) + '\n', regenerated
+
+
+def build_step_definitions(feature, existing_text, resource_file, library_file):
+    """
+    Returns (step definition text, added keyword names), appending skeletons for undefined steps only
+    """
+    if existing_text:
+        text = existing_text.rstrip('\n') + '\n'
+        sections = split_sections(existing_text)
+        keyword_lines = [line for header, lines in sections if header and 'keyword' in header.lower()
+                         for line in lines]
+        defined = set(normalize_keyword(name) for name, _ in split_items(keyword_lines)[1:])
+        has_keywords = any(header and 'keyword' in header.lower() for header, _ in sections)
+    else:
+        text = '\n'.join([
+            '*** Settings ***',
+            _setting('Documentation', 'Generated by _feature_compiler on {}_'.format(time.strftime('%Y-%m-%dT%H:%M:%S'))),
+            _setting('Library', 'Collections'),
+            _setting('Resource', resource_file),
+            _setting('Library', library_file),
+        ]) + '\n'
+        defined = set()
+        has_keywords = False
+
+    added = []
+    for scenario in feature.scenarios:
+        for step in scenario.steps:
+            name = keyword_name(step)
+            if normalize_keyword(name) not in defined:
+                defined.add(normalize_keyword(name))
+                added.append(name)
+    if not added:
+        return text, added
+    skeletons = '\n'.join('{}\n{}\n'.format(name, SKELETON_BODY) for name in added)
+    if has_keywords:
+        return text + '\n' + skeletons, added
+    return text + '\n*** Keywords ***\n' + skeletons, added
+
+
+class FeatureCompiler(object):
+    """
+    Compiles feature files incrementally into Robot Framework suites
+
+    Parameters:
+        - output_dir (str): Directory for generated files (Default: directory of each feature file)
+        - cache_file (str): Cache file (Default: .feature_cache.json in the output directory)
+        - force (bool): Ignore cached hashes and rewrite all test cases of every feature
+    """
+
+    def __init__(self, output_dir=None, cache_file=None, force=False, resource=DEFAULT_RESOURCE,
+                 library=DEFAULT_LIBRARY):
+        self.output_dir = output_dir
+        self.cache_file = cache_file
+        self.force = force
+        self.resource = resource
+        self.library = library
+        self._caches = {}
+
+    def _cache_path(self, output_dir):
+        return self.cache_file or os.path.join(output_dir, CACHE_FILE_NAME)
+
+    def _cache(self, output_dir):
+        path = self._cache_path(output_dir)
+        if path not in self._caches:
+            cache = {'version': CACHE_VERSION, 'features': {}}
+            if os.path.exists(path):
+                with open(path) as cache_file:
+                    loaded = json.load(cache_file)
+                if loaded.get('version') == CACHE_VERSION:
+                    cache = loaded
+            self._caches[path] = cache
+        return self._caches[path]
+
+    def save(self):
+        for path, cache in self._caches.items():
+            temp_path = '{}.{}.tmp'.format(path, os.getpid())
+            with open(temp_path, 'w') as cache_file:
+                json.dump(cache, cache_file, indent=1, sort_keys=True)
+            os.replace(temp_path, path)
+
+    @staticmethod
+    def _write_if_changed(path, text):
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as existing:
+                if existing.read() == text:
+                    return False
+        with open(path, 'w', encoding='utf-8') as output:
+            output.write(text)
+        return True
+
+    @staticmethod
+    def _read(path):
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as robot_file:
+            return robot_file.read()
+
+    def compile(self, feature_file):
+        """
+        Compiles `feature_file` if it changed since the last run
+
+        Returns:
+            - dict: feature, status (skipped or compiled), suite, regenerated scenarios, added keywords
+        """
+        feature_file = os.path.abspath(feature_file)
+        output_dir = os.path.abspath(self.output_dir or os.path.dirname(feature_file))
+        cache = self._cache(output_dir)['features']
+        cached = cache.get(feature_file, {})
+        stat = os.stat(feature_file)
+        outputs_exist = all(os.path.exists(path) for path in cached.get('outputs', ['']))
+        result = {'feature': feature_file, 'status': 'skipped', 'suite': cached.get('outputs', [None])[0],
+                  'regenerated': [], 'added_keywords': []}
+        if not self.force and outputs_exist and cached.get('mtime_ns') == stat.st_mtime_ns \
+                and cached.get('size') == stat.st_size:
+            return result
+        with open(feature_file, 'rb') as source:
+            content = source.read()
+        digest = hashlib.sha1(content).hexdigest()
+        if not self.force and outputs_exist and cached.get('sha1') == digest:
+            cached.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            return result
+
+        feature = parse_feature(content.decode('utf-8-sig'), feature_file)
+        suite_path = os.path.join(output_dir, feature.suite_name + '.robot')
+        step_definitions_path = os.path.join(output_dir, feature.suite_name + '_step_definitions.robot')
+        os.makedirs(output_dir, exist_ok=True)
+        cached_scenarios = {} if self.force else cached.get('scenarios', {})
+        suite_text, regenerated = build_suite(feature, self._read(suite_path), cached_scenarios,
+                                              os.path.basename(step_definitions_path),
+                                              _relative(self.resource, output_dir))
+        step_text, added = build_step_definitions(feature, self._read(step_definitions_path),
+                                                  _relative(self.resource, output_dir),
+                                                  _relative(self.library, output_dir))
+        self._write_if_changed(suite_path, suite_text)
+        self._write_if_changed(step_definitions_path, step_text)
+        cache[feature_file] = {
+            'sha1': digest, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size,
+            'outputs': [suite_path, step_definitions_path],
+            'scenarios': {scenario.name: scenario.digest() for scenario in feature.scenarios},
+        }
+        result.update(status='compiled', suite=suite_path, regenerated=regenerated, added_keywords=added)
+        return result
+
+
+def find_feature_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, file_names in sorted(os.walk(path)):
+                for file_name in sorted(file_names):
+                    if file_name.endswith('.feature'):
+                        yield os.path.join(directory, file_name)
+        else:
+            yield path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Incrementally compile gherkin feature files into Robot suites')
+    parser.add_argument('paths', nargs='+', help='Feature files or directories searched for *.feature')
+    parser.add_argument('--output-dir', default=None, help='Default: directory of each feature file')
+    parser.add_argument('--cache', default=None, help='Cache file (Default: <output dir>/{})'.format(CACHE_FILE_NAME))
+    parser.add_argument('--force', action='store_true', help='Regenerate all test cases, keep step definitions')
+    args = parser.parse_args(argv)
+
+    compiler = FeatureCompiler(args.output_dir, args.cache, args.force)
+    started = time.perf_counter()
+    compiled = skipped = 0
+    try:
+        for feature_file in find_feature_files(args.paths):
+            result = compiler.compile(feature_file)
+            if result['status'] == 'skipped':
+                skipped += 1
+                continue
+            compiled += 1
+            print('{}: {} test cases regenerated, {} step keywords added'.format(
+                os.path.relpath(result['suite']), len(result['regenerated']), len(result['added_keywords'])))
+    finally:
+        compiler.save()
+    print('{} features compiled, {} unchanged skipped in {:.3f} s'.format(
+        compiled, skipped, time.perf_counter() - started))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
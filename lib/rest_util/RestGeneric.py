@@ -1,26 +1,30 @@
-import json
 import urllib3
-import pandas as pd
-import os
-import sys
-import six
-import requests
-from functools import reduce
-import operator
-import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date
+from urllib.parse import quote
 
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from robot.api import logger as log
 
-cwd = os.path.abspath(os.path.dirname(__file__))
-project_path = cwd.split('\\lib')[0]
-if project_path not in sys.path:
-    sys.path.append(project_path)
+import rest_auth
+import rest_cassette
+import rest_codec
+import rest_data_source
+import rest_json_diff
+import rest_json_path
+import rest_load
+import rest_metrics
+import rest_paginator
+import rest_runner
+import rest_stub
+from rest_auth import cache as token_cache
+from rest_cache import cache as response_cache
+from rest_data_source import cache as data_cache
+from rest_json_index import JsonIndex
+from rest_json_stream import JsonStream
+from rest_scheduler import scheduler as request_scheduler
+from rest_session import registry as session_registry
 
-from pandas import ExcelFile
-from robot.api import logger as log
-from six import iteritems
-from six.moves.urllib.parse import quote
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 
 class RestGeneric(object):
@@ -48,7 +52,7 @@ class RestGeneric(object):
         if len(kwargs) == 0:
             return url
         url += "?"
-        for k, v in iteritems(kwargs):
+        for k, v in kwargs.items():
             v = str(v)
             url += "{key}={value}&".format(key=k, value=quote(v))
         url = url[:-1]
@@ -67,19 +71,340 @@ class RestGeneric(object):
         Returns:
             - urls (dict): URL dictinory in format {'TC_ID' : 'URL to execute'}
         """
-        df = pd.read_excel(ExcelFile(excel_file_loc), sheet_name, index_col=0, dtype=str)
+        df = data_cache.read_excel(excel_file_loc, sheet_name, index_col=0, dtype=str)
         urls = {}
-        for tc_id in df.index:
-            api_url = df['Endpoint'][tc_id]
+        param_names = list(df.columns[3:])
+        for tc_id, api_url, *cell_values in zip(df.index, df['Endpoint'], *(df[name] for name in param_names)):
             params_dict = {}
-            for param_name in df.columns[3:]:
-                cell_value = df[param_name][tc_id]
+            for param_name, cell_value in zip(param_names, cell_values):
                 if str(cell_value) != 'nan':
-                    k, v = param_name, cell_value
-                    params_dict[k] = v
-                urls[tc_id] = RestGeneric.generate_rest_url_with_args(base_url, api_url, **params_dict)
+                    params_dict[param_name] = cell_value
+            urls[tc_id] = RestGeneric.generate_rest_url_with_args(base_url, api_url, **params_dict)
         return urls
 
+    @staticmethod
+    def run_excel_test_cases_in_parallel(base_url, excel_file_loc, sheet_name, workers=None, method='GET',
+                                         headers=None, authorization_key=None, auth_key_name=None,
+                                         keep_content=False):
+        """
+        Executes Test Cases stored in Excel sheet on a pool of worker processes
+
+        Test cases are generated by RestGeneric.generate_rest_urls_from_excel and sharded
+        deterministically by TC_ID over the workers; every worker reuses its own pooled sessions.
+
+        Parameters:
+            - base_url, excel_file_loc, sheet_name: Same as RestGeneric.generate_rest_urls_from_excel
+            - workers (int): Number of worker processes (Default: number of CPUs)
+            - method (str): HTTP method executed for every test case (Default: GET)
+            - headers, authorization_key, auth_key_name: Same as execute_*_request
+            - keep_content (bool): Return response content of every test case (Default: False)
+
+        Returns:
+            - results (list): Dictionaries with tc_id, url, status_code, elapsed (seconds), error, worker and
+                content, in sheet order. Requests that raised an error have status_code None.
+        """
+        urls = RestGeneric.generate_rest_urls_from_excel(base_url, excel_file_loc, sheet_name)
+        results = rest_runner.run_sharded(urls, workers, method, headers, authorization_key, auth_key_name,
+                                          keep_content)
+        summary = rest_runner.summarize(results)
+        rows = ''.join('<tr><td>{tc_id}</td><td>{status_code}</td><td>{elapsed:.3f}</td><td>{error}</td></tr>'
+                       .format(**result) for result in results)
+        log.info('<table border="1"><tr><th>TC_ID</th><th>Status</th><th>Elapsed (s)</th><th>Error</th></tr>'
+                 '{}</table>'.format(rows), html=True)
+        log.info('Executed {test_cases} test cases on {workers} workers, {errors} errors, '
+                 'max elapsed {max_elapsed}s'.format(**summary))
+        return results
+
+    @staticmethod
+    def open_http_session(base_url, pool_connections=10, pool_maxsize=10, idle_timeout=300):
+        """
+            Opens a pooled keep-alive HTTP session for host of `base_url`
+
+            All execute_*_request keywords reuse this session for URLs on the same host.
+            Hosts without an explicitly opened session get one with default settings on first request.
+
+            Parameters:
+                - base_url (str): Base URL (or any URL) of the host
+                - pool_connections (int): Number of connection pools to cache
+                - pool_maxsize (int): Maximum number of connections kept open per host
+                - idle_timeout (int): Seconds after which an unused session is recycled (0 disables)
+
+            Returns:
+                - str: Session key in format scheme://host:port
+        """
+        return session_registry.open(base_url, int(pool_connections), int(pool_maxsize), float(idle_timeout))
+
+    @staticmethod
+    def close_http_session(base_url):
+        """
+            Closes pooled HTTP session for host of `base_url`
+
+            Returns:
+                - bool: `True` if a session was open for the host, `False` otherwise
+        """
+        return session_registry.close(base_url)
+
+    @staticmethod
+    def close_all_http_sessions():
+        """
+            Closes all pooled HTTP sessions, typically from suite teardown
+
+            Returns:
+                - int: Number of sessions closed
+        """
+        return session_registry.close_all()
+
+    @staticmethod
+    def enable_response_cache(max_entries=256, ttl=0, vary_headers='Accept,Authorization'):
+        """
+            Enables client side cache of GET responses for execute_get_request
+
+            Cached responses are revalidated with If-None-Match / If-Modified-Since and served from cache
+            on 304. POST, PUT, PATCH and DELETE requests through RestGeneric invalidate cached responses of
+            the same resource path, its parent collections and its sub resources.
+
+            Parameters:
+                - max_entries (int): Maximum number of cached responses (LRU)
+                - ttl (float): Seconds a cached response is served without contacting the server,
+                    0 revalidates on every request (Default: 0)
+                - vary_headers (str): Comma separated request headers that are part of the cache key
+        """
+        response_cache.configure(max_entries, ttl, vary_headers)
+        response_cache.enabled = True
+
+    @staticmethod
+    def disable_response_cache():
+        """
+            Disables and clears client side cache of GET responses
+        """
+        response_cache.enabled = False
+        response_cache.clear()
+
+    @staticmethod
+    def use_cassette(path, mode='auto', match_on='method,url,body'):
+        """
+            Records and/or replays requests of all execute_*_request keywords with cassette file `path`
+
+            Parameters:
+                - path (str): Cassette file (gzip compressed JSON)
+                - mode (str): record - always send and record, cassette is rewritten on eject
+                              replay - serve from cassette only, fail on unknown requests (no network)
+                              auto - replay known requests, send and record unknown ones (Default)
+                - match_on (str): Comma separated match rules: method, url, path, body and
+                    header:<Name> (Default: method,url,body)
+
+            Returns:
+                - int: Number of distinct requests recorded in cassette
+        """
+        RestGeneric.eject_cassette()
+        rest_cassette.active = rest_cassette.Cassette(path, mode, match_on)
+        return len(rest_cassette.active.interactions)
+
+    @staticmethod
+    def eject_cassette():
+        """
+            Stops using current cassette and saves newly recorded interactions, typically from suite teardown
+
+            Returns:
+                - bool: `True` if a cassette was in use, `False` otherwise
+        """
+        cassette, rest_cassette.active = rest_cassette.active, None
+        if cassette is None:
+            return False
+        cassette.save()
+        return True
+
+    @staticmethod
+    def enable_request_scheduler(rate=0, burst=0, max_retries=3, backoff_base=0.5, backoff_max=30,
+                                 initial_concurrency=4, min_concurrency=1, max_concurrency=32, latency_tolerance=3):
+        """
+            Enables rate limiting, adaptive concurrency and retries for all request keywords
+
+            State is kept per host and shared by single request, batch, pagination and load test keywords
+            (Refer: rest_scheduler). 429 and 503 answers are retried after their Retry-After delay (which also
+            pauses all other requests to the host) or a jittered exponential backoff; connection errors are
+            retried for GET, PUT and DELETE only.
+
+            Parameters:
+                - rate (float): Maximum requests per second per host, 0 does not limit the rate (Default: 0)
+                - burst (int): Requests allowed at once above `rate` (Default: `rate`)
+                - max_retries (int): Retries of a throttled or failed request (Default: 3)
+                - backoff_base (float): Backoff of the first retry in seconds, doubled per retry (Default: 0.5)
+                - backoff_max (float): Maximum backoff in seconds (Default: 30)
+                - initial_concurrency, min_concurrency, max_concurrency (int): Bounds of requests in flight per
+                    host, the limit grows on success and halves on throttling, errors or latency spikes
+                - latency_tolerance (float): Latency above this multiple of the baseline latency counts as
+                    overload, 0 reacts to throttling and errors only (Default: 3)
+        """
+        request_scheduler.configure(rate, burst, max_retries, backoff_base, backoff_max,
+                                    initial_concurrency=initial_concurrency, min_concurrency=min_concurrency,
+                                    max_concurrency=max_concurrency, latency_tolerance=latency_tolerance)
+        request_scheduler.enabled = True
+
+    @staticmethod
+    def disable_request_scheduler():
+        """
+            Disables rate limiting, adaptive concurrency and retries of request keywords
+        """
+        request_scheduler.enabled = False
+        request_scheduler.reset()
+
+    @staticmethod
+    def get_request_scheduler_stats():
+        """
+            Returns per host scheduler statistics
+
+            Returns:
+                - dict: {scheme://host: {requests, retries, throttled, errors, concurrency_limit, in_flight}}
+        """
+        return request_scheduler.stats()
+
+    @staticmethod
+    def get_last_request_timings():
+        """
+            Returns timing breakdown of the last request sent over the network by the current thread
+
+            Returns:
+                - dict: Milliseconds per phase: dns, connect, tls (0 on a reused connection), ttfb, download
+                    (`None` for streamed responses) and total, `None` if no request was sent yet
+        """
+        timings = rest_metrics.last_timings()
+        if timings is None:
+            return None
+        return {phase: None if seconds is None else round(seconds * 1000, 3) for phase, seconds in timings.items()}
+
+    @staticmethod
+    def get_latency_metrics():
+        """
+            Returns request counts and latency percentiles recorded since start or last reset
+
+            Returns:
+                - list: One dict per method, host and endpoint template (e.g. /public-api/users/{id}) with
+                    requests, errors, status_codes and per phase count, mean_ms, max_ms, p50_ms, p90_ms, p99_ms
+        """
+        return rest_metrics.registry.to_json()
+
+    @staticmethod
+    def export_latency_metrics(file_path, output_format='json'):
+        """
+            Writes recorded request latency metrics to `file_path`
+
+            Parameters:
+                - file_path (str): Output file
+                - output_format (str): json or prometheus (text exposition format)
+
+            Returns:
+                - str: `file_path`
+        """
+        return rest_metrics.registry.write(file_path, output_format)
+
+    @staticmethod
+    def reset_latency_metrics():
+        """
+            Clears recorded request latency metrics
+        """
+        rest_metrics.registry.reset()
+
+    @staticmethod
+    def get_authorization_token(login_url, request_body=None, headers=None, auth_key_name=None, token_key_path=None,
+                                ttl=rest_auth.DEFAULT_TTL, refresh_margin=rest_auth.DEFAULT_REFRESH_MARGIN, base_url=None):
+        """
+            Returns authorization token from cache, logging in with POST to `login_url` only when needed
+
+            Tokens are cached per host and credentials and reused until `refresh_margin` seconds before expiry,
+            then refreshed in background (Refer: rest_auth). Expiry is read from expires_in of the login response,
+            the JWT exp claim of the token or `ttl`. Request keywords called without `authorization_key` send the
+            token to URLs under `base_url` automatically, unless their headers already contain it.
+
+            Parameters:
+                - login_url (str): Session/login API URL
+                - request_body (dict|str): Login request body with credentials
+                - headers (dict): Login request headers (Default: JSON content type)
+                - auth_key_name (str): Header name for the token, also read from login response body if given
+                    (Default: Authorization, read from Authorization response header)
+                - token_key_path (str): Key path of the token in login response body
+                    (Refer: RestGeneric.get_value_by_key_from_json)
+                - ttl (float): Token lifetime in seconds if neither expires_in nor a JWT exp claim is available
+                - refresh_margin (float): Seconds before expiry a background refresh starts
+                - base_url (str): URL prefix the token is sent to automatically (Default: host of `login_url`)
+
+            Returns:
+                - str: Authorization token
+        """
+        login_headers = dict(headers) if headers is not None else {"Content-Type": "application/json", "Accept": "*/*"}
+
+        def login():
+            response = RestGeneric._send_request('POST', login_url, dict(login_headers), request_body)
+            if response.status_code >= 400:
+                raise rest_auth.AuthenticationError('Login to {} failed with status code {}'.format(
+                    login_url, response.status_code))
+            body = rest_codec.loads(response.content) if response.content else {}
+            if token_key_path:
+                token = rest_json_path.get_value(body, token_key_path)
+            elif auth_key_name is not None:
+                token = body[auth_key_name]
+            else:
+                token = response.headers.get('Authorization')
+            return token, body.get('expires_in') if isinstance(body, dict) else None
+
+        key = rest_auth.credentials_key(login_url, request_body, auth_key_name, token_key_path)
+        return token_cache.get(key, login, base_url or key[0], ttl, refresh_margin,
+                               auth_key_name or rest_auth.DEFAULT_HEADER_NAME)
+
+    @staticmethod
+    def set_authorization_token(base_url, token, auth_key_name=None, ttl=0):
+        """
+            Sends `token` automatically with requests to URLs under `base_url`
+
+            Request keywords called without `authorization_key` add the token, unless their headers already
+            contain the header (eg. Set Authorization Token    ${BASE_URL}    Bearer ${ACCESS_TOKEN}).
+
+            Parameters:
+                - base_url (str): URL prefix
+                - token (str): Header value
+                - auth_key_name (str): Header name (Default: Authorization)
+                - ttl (float): Seconds the token is valid, 0 never expires (Default: 0)
+        """
+        token_cache.set_static(base_url, token, auth_key_name or rest_auth.DEFAULT_HEADER_NAME, ttl)
+
+    @staticmethod
+    def clear_authorization_tokens():
+        """
+            Forgets all cached and static authorization tokens
+        """
+        token_cache.clear()
+
+    @staticmethod
+    def _transport(method, url, headers, request_body=None, stream=False):
+        cassette = rest_cassette.active
+        if cassette is not None:
+            return cassette.play(method, url, headers, request_body,
+                                 lambda: RestGeneric._network_request(method, url, headers, request_body, stream),
+                                 stream)
+        return RestGeneric._network_request(method, url, headers, request_body, stream)
+
+    @staticmethod
+    def _network_request(method, url, headers, request_body=None, stream=False):
+        def send():
+            return rest_metrics.timed_request(method, url, lambda: session_registry.get(url).request(
+                method, url, data=request_body, headers=headers, verify=False, stream=stream), streamed=stream)
+
+        if request_scheduler.enabled:
+            return request_scheduler.execute(method, url, send)
+        return send()
+
+    @staticmethod
+    def _send_request(method, url, headers, request_body=None, stream=False):
+        if isinstance(request_body, (dict, list)):
+            request_body = rest_codec.dumps(request_body)
+        if response_cache.enabled and method == 'GET' and not stream:
+            return response_cache.get(url, headers, lambda validators: RestGeneric._transport(
+                method, url, dict(headers, **validators)))
+        response = RestGeneric._transport(method, url, headers, request_body, stream)
+        if response_cache.enabled and method != 'GET':
+            response_cache.invalidate(url)
+        return response
+
     @staticmethod
     def execute_get_request(url, headers=None, authorization_key=None, auth_key_name=None):
         """
@@ -106,14 +431,117 @@ class RestGeneric(object):
                 "Accept-Encoding": "gzip, deflate",
                 "Connection": "keep-alive"
             }
+        if authorization_key is None:
+            authorization_key, auth_key_name = token_cache.authorization_for(url, headers, auth_key_name)
         if authorization_key is not None:
+            headers = dict(headers)
             if auth_key_name is None:
                 headers["Authorization"] = authorization_key
             else:
                 headers[auth_key_name] = authorization_key
-        response = requests.get(url, headers=headers, verify=False)
+        response = RestGeneric._send_request('GET', url, headers)
         return response.content, response.status_code, response.headers
 
+    @staticmethod
+    def execute_streamed_get_request(url, headers=None, authorization_key=None, auth_key_name=None,
+                                     chunk_size=65536):
+        """
+            Executes a HTTP GET request without loading response body in memory
+
+            Response body is returned as a JSON stream that is read incrementally by
+            Get Value By Key From Json, Get Values By Key Paths, Iterate Json Stream Items and
+            Get Filtered Object List, so memory stays flat for arbitrarily large payloads.
+            A JSON stream can be read only once. The pooled connection is released when the stream has
+            been read to the end; close a stream that is not read completely with Close Json Stream.
+            With a cassette in use, recorded responses are replayed from the cassette, unrecorded
+            requests fail since streamed responses are not recorded.
+
+            Parameters:
+                - url, headers, authorization_key, auth_key_name: Same as RestGeneric.execute_get_request
+                - chunk_size (int): Number of bytes read from network at a time
+
+            Returns:
+                - It returns following items for validations
+                    - response content as JSON stream (Refer: rest_json_stream.JsonStream)
+                    - response status code
+                    - response header
+        """
+        if headers is None:
+            headers = {
+                "Content-Type": "application/json",
+                "Accept": "*/*",
+                "Accept-Encoding": "gzip, deflate",
+                "Connection": "keep-alive"
+            }
+        if authorization_key is None:
+            authorization_key, auth_key_name = token_cache.authorization_for(url, headers, auth_key_name)
+        if authorization_key is not None:
+            headers = dict(headers)
+            if auth_key_name is None:
+                headers["Authorization"] = authorization_key
+            else:
+                headers[auth_key_name] = authorization_key
+        response = RestGeneric._send_request('GET', url, headers, stream=True)
+        content = JsonStream(response.iter_content(int(chunk_size)), on_close=response.close)
+        return content, response.status_code, response.headers
+
+    @staticmethod
+    def iterate_json_stream_items(json_stream, key_path=''):
+        """
+            Lazily iterates elements of the array at `key_path` of a JSON stream
+
+            Parameters:
+                - json_stream (JsonStream): Content returned by RestGeneric.execute_streamed_get_request
+                - key_path (str): Key path of the array (eg. data), empty for root array
+
+            Returns:
+                - iterator: Decoded array elements, usable in FOR loops and Get Filtered Object List
+        """
+        return json_stream.iter_items(key_path)
+
+    @staticmethod
+    def close_json_stream(json_stream):
+        """
+            Closes a JSON stream that is not read to the end, releasing its pooled connection
+
+            Parameters:
+                - json_stream (JsonStream): Content returned by RestGeneric.execute_streamed_get_request
+        """
+        json_stream.close()
+
+    @staticmethod
+    def iterate_all_pages(url, headers=None, authorization_key=None, auth_key_name=None,
+                          window=rest_paginator.DEFAULT_WINDOW, items_key_path=rest_paginator.DEFAULT_ITEMS_KEY_PATH,
+                          pages_key_path=rest_paginator.DEFAULT_PAGES_KEY_PATH, page_param='page', max_pages=0):
+        """
+            Lazily iterates items of all pages of a paginated list endpoint
+
+            The page count is read from the first page, remaining pages are fetched concurrently while
+            items of earlier pages are consumed (Refer: rest_paginator). Items keep page order.
+
+            Parameters:
+                - url, headers, authorization_key, auth_key_name: Same as RestGeneric.execute_get_request
+                - window (int): Maximum number of pages fetched concurrently (Default: 4)
+                - items_key_path (str): Key path of item list in a page (Default: data)
+                - pages_key_path (str): Key path of page count in first page (Default: meta.pagination.pages)
+                - page_param (str): Page query parameter (Default: page)
+                - max_pages (int): Maximum number of pages to fetch, 0 fetches all (Default: 0)
+
+            Returns:
+                - iterator: Items of all pages, usable in FOR loops and Get Filtered Object List.
+                    Fails when a page request returns status code >= 400.
+        """
+        spec = {'method': 'GET', 'headers': headers, 'authorization_key': authorization_key,
+                'auth_key_name': auth_key_name}
+
+        def fetch(page_url):
+            content, status_code = RestGeneric._execute_request_spec(dict(spec, url=page_url))[:2]
+            if status_code >= 400:
+                raise rest_paginator.PageFetchError('GET {} failed with status code {}'.format(page_url, status_code))
+            return rest_codec.loads(content)
+
+        return rest_paginator.iterate_pages(fetch, url, window, items_key_path, pages_key_path, page_param, max_pages)
+
     @staticmethod
     def execute_post_request(url, request_body=None, headers=None, authorization_key=None, auth_key_name=None):
         """
@@ -121,6 +549,8 @@ class RestGeneric(object):
             Parameters:
                 - url (string): URL for POST request
                 - request_body (dictionary): JSON formatted request body for POST request
+                    A dictionary or list is serialized to JSON once (Refer: rest_codec), a string is sent as is.
+                    With orjson installed, NaN and Infinity values are sent as null
                 - header (dictionary): JSON formatted request body for POST request.
                     This is optional parameter if not provided it takes default parameters in headers.
                 - authorization_key (string): authentication key, need to pass for authentication.
@@ -141,17 +571,20 @@ class RestGeneric(object):
                 "Accept": "*/*",
             }
 
+        if authorization_key is None and 'api/v1/sessions' not in url:
+            authorization_key, auth_key_name = token_cache.authorization_for(url, headers, auth_key_name)
         if authorization_key is not None:
+            headers = dict(headers)
             if auth_key_name is None:
                 headers["Authorization"] = authorization_key
             else:
                 headers[auth_key_name] = authorization_key
-        response = requests.post(url, data=request_body, headers=headers, verify=False)
+        response = RestGeneric._send_request('POST', url, headers, request_body)
         if 'api/v1/sessions' in url:
             if auth_key_name is None:
                 return response.content, response.status_code, response.headers, response.headers['Authorization']
             else:
-                return response.content, response.status_code, response.headers, response.json()[auth_key_name]
+                return response.content, response.status_code, response.headers, rest_codec.loads(response.content)[auth_key_name]
         else:
             return response.content, response.status_code, response.headers
 
@@ -163,6 +596,8 @@ class RestGeneric(object):
             Parameters:
                 - url (string): URL for POST request
                 - request_body (dictionary): JSON formatted request body for POST request
+                    A dictionary or list is serialized to JSON once (Refer: rest_codec), a string is sent as is.
+                    With orjson installed, NaN and Infinity values are sent as null
                 - header (dictionary): JSON formatted request body for POST request.
                     This is optional parameter if not provided it takes default parameters in headers.
                 - authorization_key (string): authentication key, need to pass for authentication.
@@ -182,12 +617,15 @@ class RestGeneric(object):
                 "Accept-Encoding": "gzip, deflate",
                 "Connection": "keep-alive"
             }
+        if authorization_key is None:
+            authorization_key, auth_key_name = token_cache.authorization_for(url, headers, auth_key_name)
         if authorization_key is not None:
+            headers = dict(headers)
             if auth_key_name is None:
                 headers["Authorization"] = authorization_key
             else:
                 headers[auth_key_name] = authorization_key
-        response = requests.put(url, data=request_body, headers=headers, verify=False)
+        response = RestGeneric._send_request('PUT', url, headers, request_body)
         return response.content, response.status_code, response.headers
 
     @staticmethod
@@ -198,6 +636,8 @@ class RestGeneric(object):
             Parameters:
                 - url (string): URL for POST request
                 - request_body (dictionary): JSON formatted request body for POST request
+                    A dictionary or list is serialized to JSON once (Refer: rest_codec), a string is sent as is.
+                    With orjson installed, NaN and Infinity values are sent as null
                 - header (dictionary): JSON formatted request body for POST request.
                     This is optional parameter if not provided it takes default parameters in headers.
                 - authorization_key (string): authentication key, need to pass for authentication.
@@ -217,13 +657,16 @@ class RestGeneric(object):
                 "Accept-Encoding": "gzip, deflate",
                 "Connection": "keep-alive"
             }
+        if authorization_key is None:
+            authorization_key, auth_key_name = token_cache.authorization_for(url, headers, auth_key_name)
         if authorization_key is not None:
+            headers = dict(headers)
             if auth_key_name is None:
                 headers["Authorization"] = authorization_key
             else:
                 headers[auth_key_name] = authorization_key
 
-        response = requests.patch(url, data=request_body, headers=headers, verify=False)
+        response = RestGeneric._send_request('PATCH', url, headers, request_body)
         return response.content, response.status_code, response.headers
 
     @staticmethod
@@ -252,14 +695,139 @@ class RestGeneric(object):
                 "Accept-Encoding": "gzip, deflate",
                 "Connection": "keep-alive"
             }
+        if authorization_key is None:
+            authorization_key, auth_key_name = token_cache.authorization_for(url, headers, auth_key_name)
         if authorization_key is not None:
+            headers = dict(headers)
             if auth_key_name is None:
                 headers["Authorization"] = authorization_key
             else:
                 headers[auth_key_name] = authorization_key
-        response = requests.delete(url, headers=headers, verify=False)
+        response = RestGeneric._send_request('DELETE', url, headers)
         return response.content, response.status_code, response.headers
 
+    @staticmethod
+    def _execute_request_spec(spec):
+        method = str(spec.get('method', 'GET')).lower()
+        if method not in ('get', 'post', 'put', 'patch', 'delete'):
+            raise ValueError('Unsupported HTTP method: {}'.format(method))
+        headers = spec.get('headers')
+        kwargs = {
+            'headers': dict(headers) if headers is not None else None,
+            'authorization_key': spec.get('authorization_key'),
+            'auth_key_name': spec.get('auth_key_name'),
+        }
+        if method in ('post', 'put', 'patch'):
+            kwargs['request_body'] = spec.get('body', spec.get('request_body'))
+        return getattr(RestGeneric, 'execute_{}_request'.format(method))(spec['url'], **kwargs)
+
+    @staticmethod
+    def execute_requests_concurrently(request_specs, max_workers=10):
+        """
+            Executes independent HTTP requests concurrently with bounded concurrency
+
+            Parameters:
+                - request_specs (list): List of request dictionaries with keys
+                    - method (str): GET, POST, PUT, PATCH or DELETE (Default: GET)
+                    - url (str): URL for request
+                    - body (str): Request body for POST/PUT/PATCH requests (optional)
+                    - headers (dict): Request headers (optional, same defaults as execute_*_request)
+                    - authorization_key (str), auth_key_name (str): Same as execute_*_request (optional)
+                - max_workers (int): Maximum number of requests in flight
+                    Open the session with `pool_maxsize` >= `max_workers` to keep all connections alive.
+
+            Returns:
+                - results (list): Response tuples (content, status code, headers) in the order of `request_specs`.
+                    A request that raised an error returns (error message, None, None) instead of failing the batch.
+        """
+        request_specs = list(request_specs)
+        if not request_specs:
+            return []
+        results = [None] * len(request_specs)
+        with ThreadPoolExecutor(max_workers=max(1, min(int(max_workers), len(request_specs)))) as executor:
+            futures = {executor.submit(RestGeneric._execute_request_spec, spec): index
+                       for index, spec in enumerate(request_specs)}
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    log.warn('Request {} failed: {}'.format(index, e))
+                    results[index] = (str(e), None, None)
+        return results
+
+    @staticmethod
+    def run_load_test(method, url, request_body=None, headers=None, authorization_key=None, auth_key_name=None,
+                      rps=0, concurrency=1, duration=10):
+        """
+            Replays a request template under sustained load and logs latency statistics
+
+            The request is sent through the same header/authorization handling and pooled sessions as
+            execute_*_request. Responses with status code >= 400 and raised errors count as errors.
+
+            Parameters:
+                - method (str): GET, POST, PUT, PATCH or DELETE
+                - url, request_body, headers, authorization_key, auth_key_name: Same as execute_*_request
+                - rps (float): Target requests per second, 0 sends requests back to back
+                - concurrency (int): Number of concurrent workers
+                - duration (float): Test duration in seconds
+
+            Returns:
+                - summary (dict): requests, errors, error_rate, duration, throughput (req/s) and
+                    min_ms, mean_ms, p50_ms, p90_ms, p99_ms, max_ms latencies
+        """
+        spec = {'method': method, 'url': url, 'body': request_body, 'headers': headers,
+                'authorization_key': authorization_key, 'auth_key_name': auth_key_name}
+
+        def send():
+            return RestGeneric._execute_request_spec(spec)[1]
+
+        summary = rest_load.run_load(send, duration, concurrency, rps)
+        log.info('Load test {} {}\n{}'.format(method.upper(), url, rest_load.format_summary(summary)))
+        return summary
+
+    @staticmethod
+    def start_stub_server(body=rest_stub.DEFAULT_BODY, status=200, port=0, delay=0):
+        """
+            Starts an in-process HTTP stub server answering all requests with a canned response
+
+            Parameters:
+                - body (str): Default response body
+                - status (int): Default response status code
+                - port (int): Port to listen on, 0 picks a free port
+                - delay (float): Seconds to wait before each response
+
+            Returns:
+                - str: Base URL of the stub server (eg. http://127.0.0.1:54321/)
+        """
+        server = rest_stub.StubServer(body, status, port, delay)
+        base_url = server.start()
+        rest_stub.active_servers[base_url] = server
+        return base_url
+
+    @staticmethod
+    def add_stub_route(base_url, method, path, body=rest_stub.DEFAULT_BODY, status=200):
+        """
+            Registers a canned response for `method` and `path` on stub server running at `base_url`
+        """
+        rest_stub.active_servers[base_url].add_route(method, path, body, status)
+
+    @staticmethod
+    def stop_stub_server(base_url=None):
+        """
+            Stops stub server running at `base_url`, or all stub servers if `base_url` is not given
+
+            Returns:
+                - int: Number of requests served by the stopped server(s)
+        """
+        base_urls = [base_url] if base_url is not None else list(rest_stub.active_servers)
+        hits = 0
+        for key in base_urls:
+            server = rest_stub.active_servers.pop(key)
+            server.stop()
+            hits += server.hits
+        return hits
+
     @staticmethod
     def log_error(error_response):
         """
@@ -282,19 +850,43 @@ class RestGeneric(object):
 
         Parameters:
             - json_data (dict): JSON object from which value is to be extracted
+                A JSON stream (Refer: RestGeneric.execute_streamed_get_request) is read only up to the key.
             - key_path (str): Period ('.') separated json key path (eg. key1.key2.key3...)
+                List elements are addressed by index (eg. data.0.id or data[0].id),
+                '*' selects all elements (eg. data.*.id) (Refer: rest_json_path)
 
         Returns:
             - object: Value specified by `key_path`
         """
-        if isinstance(json_data, str):
-            json_data = json.loads(json_data)
-        key_path = key_path.split('.')
-        try:
-            value = reduce(operator.getitem, key_path, json_data)
-        except KeyError as e:
-            value = e.args[0]
-        return value
+        if isinstance(json_data, JsonStream):
+            return json_data.get_value(key_path)
+        if isinstance(json_data, (str, bytes)):
+            json_data = rest_codec.loads(json_data)
+        return rest_json_path.get_value(json_data, key_path)
+
+    @staticmethod
+    def get_values_by_key_paths(json_data, *key_paths, as_dict=False):
+        """
+        Get values of several keys from `json_data` object, parsing it only once
+
+        Parameters:
+            - json_data (dict|str|JsonStream): JSON object, JSON string or JSON stream from which values are
+                to be extracted
+            - key_paths (str): Key paths (Refer: RestGeneric.get_value_by_key_from_json)
+            - as_dict (bool): Return dictionary {key_path: value} instead of list
+
+        Returns:
+            - values (list|dict): Values in the order of `key_paths`, missing keys return the key name
+        """
+        if isinstance(json_data, JsonStream):
+            values = json_data.get_values(key_paths)
+        else:
+            if isinstance(json_data, (str, bytes)):
+                json_data = rest_codec.loads(json_data)
+            values = [rest_json_path.get_value(json_data, key_path) for key_path in key_paths]
+        if as_dict:
+            return dict(zip(key_paths, values))
+        return values
 
     @staticmethod
     def delete_from_dictionary(json_data, *args):
@@ -351,63 +943,62 @@ class RestGeneric(object):
         else:
             return obj
 
-    def validate_json(self, obj_to_validate, obj_for_reference, keys_to_skip="", parent='root'):
+    def validate_json(self, obj_to_validate, obj_for_reference, keys_to_skip="", parent='root',
+                      max_mismatches=rest_json_diff.DEFAULT_MAX_MISMATCHES, first_mismatch_only=False):
         """
             Validates `obj_to_validate` against `obj_for_reference`
 
+            Neither object is modified. Lists of objects are matched element by element on a common key
+            (Refer: rest_json_diff).
+
             Parameters:
                 - obj_to_validate (dict): Json object to validate
-                - obj_for_reference (dict): Json object to validate against
+                - obj_for_reference (dict): Json object to validate against, or validator returned by
+                    RestGeneric.compile_json_validator (its own skip keys and limits are used then)
                 - keys_to_skip (str): Comma separated string of key names to skip during validation
                 - parent (str): Name for parent JSON object (Default: 'root')
+                - max_mismatches (int): Maximum number of mismatches reported, 0 reports all (Default: 100)
+                - first_mismatch_only (bool): Stop validation at first mismatch (Default: False)
 
             Returns:
                 - match (bool): `True` if objects match, `False` otherwise
                 - mismatch (str): Summary of mismatching fields
         """
-        match = True
-        if isinstance(obj_to_validate, dict) and isinstance(obj_for_reference, dict):
-            key_list_1 = sorted(obj_to_validate.keys())
-            key_list_2 = sorted(obj_for_reference.keys())
-            for key in key_list_2:
-                if key not in keys_to_skip.split(','):
-                    if key not in key_list_1:
-                        match = False
-                        self.mismatch.append('Missing key: {} -> {}'.format(parent, key))
-                    else:
-                        if key == 'device_type':
-                            obj_to_validate[key] = obj_for_reference[key]
-                        match = self.validate_json(obj_to_validate[key], obj_for_reference[key], keys_to_skip,
-                                                   parent + ' -> ' + key)[0] and match
-        elif isinstance(obj_to_validate, list) and isinstance(obj_for_reference, list):
-            if len(obj_to_validate) > 0 and len(obj_for_reference) > 0:
-                if isinstance(obj_for_reference[0], dict) and isinstance(obj_to_validate[0], dict):
-                    key_to_sort = None
-                    for key in obj_for_reference[0].keys():
-                        if key in obj_to_validate[0].keys() and isinstance(obj_for_reference[0][key], int):
-                            key_to_sort = key
-                            break
-                    if key_to_sort is None:
-                        for key in obj_for_reference[0].keys():
-                            if key in obj_to_validate[0].keys() and isinstance(obj_for_reference[0][key], str):
-                                key_to_sort = key
-                                break
-                    obj_to_validate.sort(key=lambda x: x[key_to_sort])
-                    obj_for_reference.sort(key=lambda x: x[key_to_sort])
-                    for obj1_value, obj2_value in zip(obj_to_validate, obj_for_reference):
-                        match = self.validate_json(obj1_value, obj2_value, keys_to_skip, parent)[0] and match
+        if isinstance(obj_for_reference, rest_json_diff.CompiledValidator):
+            result = obj_for_reference.validate(obj_to_validate, parent)
         else:
-            if type(obj_to_validate) != type(obj_for_reference):
-                match = False
-                self.mismatch.append('Data types mismatch for key: {}'.format(parent))
-            if str(obj_to_validate) != str(obj_for_reference):
-                match = False
-                self.mismatch.append('Values mismatch for key: {}'.format(parent))
-        return match, '\n'.join(self.mismatch)
+            diff = rest_json_diff.JsonDiff(keys_to_skip, max_mismatches, first_mismatch_only)
+            result = diff.compare(obj_to_validate, obj_for_reference, parent)
+        self.mismatch = result.mismatches
+        return result.match, result.report()
+
+    @staticmethod
+    def compile_json_validator(obj_for_reference, keys_to_skip="", tolerances=None,
+                               max_mismatches=rest_json_diff.DEFAULT_MAX_MISMATCHES, first_mismatch_only=False):
+        """
+            Compiles `obj_for_reference` into a reusable validator for RestGeneric.validate_json
+
+            The reference object is walked and prepared once, so validating many responses against the
+            same reference only walks the responses.
+
+            Parameters:
+                - obj_for_reference (dict): Json object to validate against
+                - keys_to_skip (str): Comma separated string of key names to skip during validation
+                - tolerances (dict|str): Absolute tolerance for numeric values by key name,
+                    dictionary or comma separated string (eg. price=0.01,weight=0.5)
+                - max_mismatches (int): Maximum number of mismatches reported, 0 reports all (Default: 100)
+                - first_mismatch_only (bool): Stop validation at first mismatch (Default: False)
+
+            Returns:
+                - validator (CompiledValidator): Pass as `obj_for_reference` to RestGeneric.validate_json
+        """
+        return rest_json_diff.CompiledValidator(obj_for_reference, keys_to_skip, tolerances, max_mismatches,
+                                                first_mismatch_only)
 
     @staticmethod
     def _create_filter(**kwargs):
-        return lambda obj: all(RestGeneric.get_value_by_key_from_json(obj, k) == v for k, v in iteritems(kwargs))
+        compiled = [(rest_json_path.compile_key_path(k), v) for k, v in kwargs.items()]
+        return lambda obj: all(rest_json_path.get_value(obj, key_path) == v for key_path, v in compiled)
 
     @staticmethod
     def get_filtered_object_list(list_of_objects, **filter_dict):
@@ -416,6 +1007,9 @@ class RestGeneric(object):
 
             Parameters:
                 - list_of_objects (list): List of JSON objects
+                    Any iterable works, eg. RestGeneric.iterate_json_stream_items; a JSON stream
+                    is filtered element by element from its root array, an index built by
+                    RestGeneric.build_json_index is queried without scanning the list.
                 - filter_dict (dict): Dictionary in the format {"key_path": value} used as filter
 
             Note:
@@ -424,16 +1018,74 @@ class RestGeneric(object):
             Returns:
                 list: list of objects filtered with respect to `filter_dict`
         """
+        if isinstance(list_of_objects, JsonIndex):
+            return list_of_objects.lookup(**filter_dict)
         custom_filter_func = RestGeneric._create_filter(**filter_dict)
         return list(filter(custom_filter_func, list_of_objects))
 
+    @staticmethod
+    def build_json_index(list_of_objects, *key_paths):
+        """
+            Builds an index over a list of json objects for fast repeated lookups
+
+            Parameters:
+                - list_of_objects (list): List of JSON objects (any iterable)
+                - key_paths (str): Key paths to index (Refer: RestGeneric.get_value_by_key_from_json),
+                    'key1+key2' additionally indexes the combination of both keys
+
+            Returns:
+                - index (JsonIndex): Pass as `list_of_objects` to RestGeneric.get_filtered_object_list
+                    Filters on indexed key paths are answered from the index, others are checked on the
+                    indexed candidates only.
+        """
+        return JsonIndex(list_of_objects, key_paths)
+
+    @staticmethod
+    def get_objects_in_range_from_json_index(json_index, key_path, min_value=None, max_value=None):
+        """
+            Get objects whose numeric value at `key_path` is between `min_value` and `max_value` (inclusive)
+
+            Parameters:
+                - json_index (JsonIndex): Index returned by RestGeneric.build_json_index
+                - key_path (str): Indexed key path
+                - min_value (number): Lower bound, no lower bound if not given
+                - max_value (number): Upper bound, no upper bound if not given
+
+            Returns:
+                list: list of objects in range, in original order
+        """
+        min_value = float(min_value) if isinstance(min_value, str) else min_value
+        max_value = float(max_value) if isinstance(max_value, str) else max_value
+        return json_index.range(key_path, min_value, max_value)
+
+    @staticmethod
+    def add_objects_to_json_index(json_index, *objects):
+        """
+            Adds `objects` to index returned by RestGeneric.build_json_index
+        """
+        for obj in objects:
+            json_index.insert(obj)
+
+    @staticmethod
+    def remove_objects_from_json_index(json_index, *objects):
+        """
+            Removes `objects` from index returned by RestGeneric.build_json_index
+
+            Returns:
+                - int: Number of objects removed
+        """
+        return sum(1 for obj in objects if json_index.remove(obj))
+
     @staticmethod
     def load_json(json_str):
         """
-            Load JSON string as json object <dict>
+            Load JSON string or response content (bytes) as json object <dict>
+
+            Response bytes are parsed without decoding to str first (Refer: rest_codec).
+            With orjson installed, integers outside the 64 bit range are loaded as floats.
         """
         try:
-            json_data = json.loads(json_str)
+            json_data = rest_codec.loads(json_str)
         except Exception as e:
             json_data = str(e)
             log.error(str(e))
@@ -470,13 +1122,11 @@ class RestGeneric(object):
         """
         This will return server groups and catalog details for given catalog
         """
-        windows_server_group_list= json.loads(json.dumps(windows_server_group_list))
-        linux_server_group_list = json.loads(json.dumps(linux_server_group_list))
         if not isinstance(catalog_list, list):
             raise AttributeError('expects list as first argument.')
-        if not isinstance(windows_server_group_list, json):
+        if not isinstance(windows_server_group_list, dict):
             raise AttributeError('expects dict as 2nd argument.')
-        if not isinstance(linux_server_group_list, json):
+        if not isinstance(linux_server_group_list, dict):
             raise AttributeError('expects dict as 3rd argument.')
         return catalog_list[0], catalog_list[1], catalog_list[2]
 
@@ -491,14 +1141,35 @@ class RestGeneric(object):
             - object: returns true or false if found/not found. throws exception if something goes wrong.
         """
 
-        if isinstance(json_data, str):
-            json_data = json.loads(json_data)
+        if isinstance(json_data, (str, bytes)):
+            json_data = rest_codec.loads(json_data)
         try:
             return_value = value in json_data.values()
         except KeyError as e:
             return_value = e.args[0]
         return return_value
 
+    @staticmethod
+    def set_data_file_cache(max_entries=16, sidecar_dir=None):
+        """
+        Configures process wide cache of parsed Excel/CSV files used by data keywords
+
+        Files are re-read automatically when their modification time or size changes.
+
+        Parameters:
+        - max_entries (int): Maximum number of parsed sheets/files kept in memory, 0 disables caching
+        - sidecar_dir (str): Directory where parsed sheets are stored as pickle files and loaded from
+            in later runs instead of parsing the workbook again. Not set disables sidecar files.
+        """
+        data_cache.configure(max_entries, sidecar_dir)
+
+    @staticmethod
+    def clear_data_file_cache():
+        """
+        Drops all parsed Excel/CSV files from memory cache (sidecar files are kept)
+        """
+        data_cache.clear()
+
     @staticmethod
     def get_excel_column_data(excel_file_loc, sheet_name, column_name):
         """
@@ -511,7 +1182,7 @@ class RestGeneric(object):
         Returns:
             - Data (list): DataList in format {'Data'}
         """
-        df = pd.read_excel(ExcelFile(excel_file_loc), sheet_name)
+        df = data_cache.read_excel(excel_file_loc, sheet_name)
         data = df[column_name].tolist()
         rtn = [x for x in data if str(x) != 'nan']
         print(rtn)
@@ -523,13 +1194,89 @@ class RestGeneric(object):
 
         Parameters:
         - csv_file_loc (str): OS path of excel file
-        - sheet_name (str): Sheet name to read from csv file
+        - sheet_name (str): Not used, kept for backward compatibility
+        - column_name (str): Column to read (Refer RestGeneric.iterate_csv_column_data for large files)
 
         Returns:
             - Data (list): DataList in format {'Data'}
         """
-        df = pd.read_csv(csv_file_loc)
+        df = data_cache.read_csv(csv_file_loc)
         data = df[column_name].tolist()
         rtn = [x for x in data if str(x) != 'nan']
         print(rtn)
-        return rtn
\ No newline at end of file
+        return rtn
+
+    @staticmethod
+    def iterate_csv_column_data(csv_file_loc, column_name, chunk_size=10000):
+        """
+        Lazily iterates non blank values of a column stored in csv file
+
+        Only `column_name` is parsed and at most `chunk_size` rows are held in memory, so the
+        keyword can be used in FOR loops over files with millions of rows.
+
+        Parameters:
+        - csv_file_loc (str): OS path of csv file
+        - column_name (str): Column to read
+        - chunk_size (int): Number of rows parsed at a time
+
+        Returns:
+            - iterator: Column values
+        """
+        return rest_data_source.iter_column_values(
+            rest_data_source.iter_csv_rows(csv_file_loc, [column_name], chunk_size), column_name)
+
+    @staticmethod
+    def iterate_excel_column_data(excel_file_loc, sheet_name, column_name, chunk_size=10000):
+        """
+        Lazily iterates non blank values of a column stored in Excel sheet
+
+        Values have the same types as from RestGeneric.get_excel_column_data, except that blank
+        cells of date columns are skipped instead of returned as NaT.
+
+        Parameters:
+        - excel_file_loc (str): OS path of excel file
+        - sheet_name (str): Sheet name to read from excel file
+        - column_name (str): Column to read (first row of sheet is the header)
+        - chunk_size (int): Number of rows parsed at a time
+
+        Returns:
+            - iterator: Column values
+        """
+        return rest_data_source.iter_column_values(
+            rest_data_source.iter_excel_rows(excel_file_loc, sheet_name, [column_name], chunk_size), column_name)
+
+    @staticmethod
+    def iterate_csv_rows(csv_file_loc, *column_names, chunk_size=10000):
+        """
+        Lazily iterates rows of csv file as dictionaries of the requested columns
+
+        Rows can be fed directly to FOR loops or, after building request specs, to
+        RestGeneric.execute_requests_concurrently.
+
+        Parameters:
+        - csv_file_loc (str): OS path of csv file
+        - column_names (str): Columns to read
+        - chunk_size (int): Number of rows parsed at a time
+
+        Returns:
+            - iterator: Dictionaries {column_name: value}, blank cells are `None`
+        """
+        return rest_data_source.iter_csv_rows(csv_file_loc, column_names, chunk_size)
+
+    @staticmethod
+    def iterate_excel_rows(excel_file_loc, sheet_name, *column_names, chunk_size=10000):
+        """
+        Lazily iterates rows of Excel sheet as dictionaries of the requested columns
+
+        Values have the same types as from RestGeneric.get_excel_column_data.
+
+        Parameters:
+        - excel_file_loc (str): OS path of excel file
+        - sheet_name (str): Sheet name to read from excel file
+        - column_names (str): Columns to read (first row of sheet is the header)
+        - chunk_size (int): Number of rows parsed at a time
+
+        Returns:
+            - iterator: Dictionaries {column_name: value}, blank cells are `None`
+        """
+        return rest_data_source.iter_excel_rows(excel_file_loc, sheet_name, column_names, chunk_size)
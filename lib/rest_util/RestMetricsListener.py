@@ -0,0 +1,53 @@
+"""
+Robot Framework listener writing request latency metrics of RestGeneric keywords.
+
+For every suite that sent requests a summary is written to <output dir>/rest-metrics/<suite>.json
+(and .prom), and totals of the whole run to <output dir>/rest-metrics/all.json (and .prom), e.g.
+    robot --listener lib/rest_util/RestMetricsListener.py tests/
+    robot --listener lib/rest_util/RestMetricsListener.py:C:/log/metrics:json tests/
+"""
+import os
+import re
+
+from robot.libraries.BuiltIn import BuiltIn
+
+import rest_metrics
+
+
+class RestMetricsListener(object):
+    ROBOT_LISTENER_API_VERSION = 2
+
+    def __init__(self, output_dir=None, formats='json,prometheus'):
+        """
+            Parameters:
+                - output_dir (str): Metrics directory (Default: rest-metrics in Robot output directory)
+                - formats (str): Comma separated output formats: json, prometheus
+        """
+        self.output_dir = output_dir
+        self.formats = [output_format.strip() for output_format in formats.split(',') if output_format.strip()]
+        self._scopes = []
+        self._totals = rest_metrics.registry.open_scope()
+
+    def _write(self, scope, name):
+        if self.output_dir is None:
+            return
+        if not os.path.isdir(self.output_dir):
+            os.makedirs(self.output_dir)
+        base_path = os.path.join(self.output_dir, re.sub(r'[^\w.-]+', '_', name))
+        for output_format in self.formats:
+            scope.write(base_path + ('.prom' if output_format == 'prometheus' else '.json'), output_format)
+
+    def start_suite(self, name, attrs):
+        if self.output_dir is None:
+            self.output_dir = os.path.join(BuiltIn().get_variable_value('${OUTPUT_DIR}'), 'rest-metrics')
+        self._scopes.append(rest_metrics.registry.open_scope())
+
+    def end_suite(self, name, attrs):
+        scope = rest_metrics.registry.close_scope(self._scopes.pop())
+        if len(scope):
+            self._write(scope, attrs['longname'])
+
+    def close(self):
+        rest_metrics.registry.close_scope(self._totals)
+        if len(self._totals):
+            self._write(self._totals, 'all')
@@ -0,0 +1,169 @@
+"""
+Thread safe cache of authorization tokens for RestGeneric request keywords.
+
+Tokens are obtained by a login callable and cached per host and credentials until shortly before
+they expire. Expiry is taken from the login response (expires_in), the JWT exp claim of the token
+or a fixed time to live, in that order. Within `refresh_margin` seconds of expiry the token is still
+returned while a background thread logs in again, so requests never wait for a refresh unless the
+token has already expired. Concurrent callers of an expired token share one login.
+
+Tokens are registered for a URL prefix (the login host or a base URL given with a static token);
+request keywords called without `authorization_key` send the token of the longest matching prefix.
+"""
+import base64
+import hashlib
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_TTL = 3600
+DEFAULT_REFRESH_MARGIN = 60
+DEFAULT_HEADER_NAME = 'Authorization'
+
+
+class AuthenticationError(Exception):
+    pass
+
+
+def jwt_expiry(token):
+    """
+    Returns exp claim (epoch seconds) of JWT `token` (optionally with scheme prefix), `None` if not a JWT
+    """
+    value = str(token).split()[-1]
+    parts = value.split('.')
+    if len(parts) != 3:
+        return None
+    try:
+        payload = base64.urlsafe_b64decode(parts[1] + '=' * (-len(parts[1]) % 4))
+        exp = json.loads(payload).get('exp')
+        return float(exp) if exp is not None else None
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+def credentials_key(url, *credentials):
+    """
+    Returns cache key of login at `url` with `credentials`, without keeping credentials in clear text
+    """
+    parts = urlsplit(url)
+    digest = hashlib.sha1(json.dumps([parts.path] + [credential for credential in credentials],
+                                     sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    return '{}://{}'.format(parts.scheme.lower(), parts.netloc.lower()), digest
+
+
+class _CachedToken(object):
+    __slots__ = ('login', 'ttl', 'refresh_margin', 'header_name', 'token', 'expires_at', 'refreshing', 'lock')
+
+    def __init__(self, login, ttl, refresh_margin, header_name):
+        self.login = login
+        self.ttl = float(ttl)
+        self.refresh_margin = float(refresh_margin)
+        self.header_name = header_name
+        self.token = None
+        self.expires_at = 0.0
+        self.refreshing = False
+        self.lock = threading.Lock()
+
+
+class TokenCache(object):
+    """
+    Tokens by (host, credentials digest) and their URL prefix registrations
+    """
+
+    def __init__(self):
+        self.logins = 0
+        self._entries = {}
+        self._prefixes = {}
+        self._lock = threading.Lock()
+
+    def _login(self, entry):
+        token, expires_in = entry.login()
+        if not token:
+            raise AuthenticationError('Login did not return a token')
+        if expires_in:
+            expires_at = time.time() + float(expires_in)
+        else:
+            expires_at = jwt_expiry(token) or time.time() + entry.ttl
+        entry.token, entry.expires_at = token, expires_at
+        self.logins += 1
+
+    def _refresh(self, entry):
+        try:
+            with entry.lock:
+                self._login(entry)
+        except Exception:
+            # The current token stays in use until it expires, the next call retries synchronously
+            pass
+        finally:
+            with self._lock:
+                entry.refreshing = False
+
+    def _current(self, entry):
+        now = time.time()
+        token = entry.token
+        if token is not None and now < entry.expires_at:
+            if entry.login is not None and now >= entry.expires_at - entry.refresh_margin:
+                with self._lock:
+                    start_refresh = not entry.refreshing
+                    entry.refreshing = True
+                if start_refresh:
+                    threading.Thread(target=self._refresh, args=(entry,), name='token-refresh', daemon=True).start()
+            return token
+        with entry.lock:
+            if entry.token is None or time.time() >= entry.expires_at:
+                if entry.login is None:
+                    raise AuthenticationError('Static token has expired')
+                self._login(entry)
+            return entry.token
+
+    def get(self, key, login, prefix, ttl=DEFAULT_TTL, refresh_margin=DEFAULT_REFRESH_MARGIN,
+            header_name=DEFAULT_HEADER_NAME):
+        """
+        Returns cached token of `key`, calling `login()` -> (token, expires_in or None) when needed
+
+        The token is registered for URLs starting with `prefix`.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _CachedToken(login, ttl, refresh_margin, header_name)
+            else:
+                entry.login = login
+            self._prefixes[prefix.rstrip('/')] = entry
+        return self._current(entry)
+
+    def set_static(self, prefix, token, header_name=DEFAULT_HEADER_NAME, ttl=0):
+        """
+        Registers fixed `token` for URLs starting with `prefix`, valid for `ttl` seconds (0 never expires)
+        """
+        entry = _CachedToken(None, ttl, 0, header_name)
+        entry.token = token
+        entry.expires_at = time.time() + float(ttl) if float(ttl) else float('inf')
+        with self._lock:
+            self._prefixes[prefix.rstrip('/')] = entry
+
+    def authorization_for(self, url, headers=None, header_name=None):
+        """
+        Returns (token, header name) registered for `url`, token `None` if there is none or `headers`
+        already contain the header
+        """
+        with self._lock:
+            matches = [prefix for prefix in self._prefixes
+                       if url == prefix or url.startswith(prefix + '/') or url.startswith(prefix + '?')]
+            entry = self._prefixes[max(matches, key=len)] if matches else None
+        if entry is None:
+            return None, header_name
+        name = header_name or entry.header_name
+        if headers and any(existing.lower() == name.lower() for existing in headers):
+            return None, header_name
+        return self._current(entry), name
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._prefixes = {}
+            self.logins = 0
+
+
+cache = TokenCache()
@@ -0,0 +1,157 @@
+"""
+Client side cache of GET responses for RestGeneric request keywords.
+
+When enabled, successful GET responses are stored in a size bounded LRU keyed by URL and the
+values of the configured vary request headers:
+    - within `ttl` seconds a cached response is served without contacting the server
+    - after that it is revalidated with If-None-Match / If-Modified-Since and a 304 answer is
+      served from cache
+    - POST, PUT, PATCH and DELETE requests sent through RestGeneric invalidate cached responses of
+      the same resource path, its parent collections and its sub resources
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from urllib.parse import urlsplit
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_VARY_HEADERS = ('Accept', 'Authorization')
+
+
+def resource_path(url):
+    """
+    Returns scheme://host/path of `url` without query string and trailing slash
+    """
+    parts = urlsplit(url)
+    return '{}://{}{}'.format(parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip('/'))
+
+
+class _Entry(object):
+    __slots__ = ('content', 'status_code', 'headers', 'url', 'path', 'stored_at')
+
+    def __init__(self, response, path):
+        self.content = response.content
+        self.status_code = response.status_code
+        self.headers = CaseInsensitiveDict(response.headers)
+        self.url = response.url
+        self.path = path
+        self.stored_at = time.monotonic()
+
+    @property
+    def validators(self):
+        validators = {}
+        if self.headers.get('ETag'):
+            validators['If-None-Match'] = self.headers['ETag']
+        if self.headers.get('Last-Modified'):
+            validators['If-Modified-Since'] = self.headers['Last-Modified']
+        return validators
+
+    def to_response(self):
+        response = Response()
+        response._content = self.content
+        response.status_code = self.status_code
+        response.headers = CaseInsensitiveDict(self.headers)
+        response.url = self.url
+        return response
+
+
+class ResponseCache(object):
+    """
+    LRU cache of GET responses with TTL and conditional revalidation
+
+    Parameters:
+        - max_entries (int): Maximum number of cached responses
+        - ttl (float): Seconds a response is served without revalidation, 0 always revalidates
+        - vary_headers (iterable): Request headers that are part of the cache key
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=0, vary_headers=DEFAULT_VARY_HEADERS):
+        self.enabled = False
+        self.configure(max_entries, ttl, vary_headers)
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def configure(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=0, vary_headers=DEFAULT_VARY_HEADERS):
+        if isinstance(vary_headers, str):
+            vary_headers = [header for header in vary_headers.split(',')]
+        self.max_entries = int(max_entries)
+        self.ttl = float(ttl)
+        self.vary_headers = tuple(header.strip().lower() for header in vary_headers if header.strip())
+
+    def _key(self, url, headers):
+        headers = {name.lower(): value for name, value in (headers or {}).items()}
+        return url, tuple(headers.get(name) for name in self.vary_headers)
+
+    def get(self, url, headers, send):
+        """
+        Returns GET response for `url`, from cache when possible
+
+        Parameters:
+            - send (callable): send(extra_headers) executes the GET request with additional headers
+        """
+        key = self._key(url, headers)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if time.monotonic() - entry.stored_at < self.ttl:
+                    self.hits += 1
+                    return entry.to_response()
+        validators = entry.validators if entry is not None else {}
+        response = send(validators)
+        if response.status_code == 304 and entry is not None:
+            with self._lock:
+                self.revalidated += 1
+                entry.stored_at = time.monotonic()
+            return entry.to_response()
+        with self._lock:
+            self.misses += 1
+        if response.status_code == 200 and (self.ttl > 0 or 'ETag' in response.headers
+                                            or 'Last-Modified' in response.headers):
+            self._store(key, _Entry(response, resource_path(url)))
+        elif entry is not None:
+            self._discard(key)
+        return response
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate(self, url):
+        """
+        Drops cached responses of resource path of `url`, its parents and its sub resources
+
+        Returns:
+            - int: Number of responses dropped
+        """
+        path = resource_path(url)
+        with self._lock:
+            stale = [key for key, entry in self._entries.items()
+                     if entry.path == path or entry.path.startswith(path + '/') or path.startswith(entry.path + '/')]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.revalidated = self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+cache = ResponseCache()
@@ -0,0 +1,188 @@
+"""
+Record/replay of HTTP interactions for offline runs of RestGeneric request keywords.
+
+A cassette is a gzip compressed JSON file holding recorded responses indexed by a digest of the
+request fields selected by the match rules, so replaying a request is a single dict lookup.
+
+Modes:
+    - record: every request goes to the server and is recorded, the cassette is rewritten on eject
+    - replay: requests are served from the cassette only, unknown requests raise an error
+    - auto: known requests are replayed, unknown requests go to the server and are recorded
+
+Match rules (comma separated):
+    - method: HTTP method
+    - url: URL with query parameters sorted
+    - path: URL without query string
+    - body: request body, JSON bodies are compared independent of key order and whitespace
+    - header:<Name>: value of request header <Name>
+
+Streamed responses are replayed but not recorded, since recording would read the whole body.
+"""
+import base64
+import gzip
+import hashlib
+import json
+import os
+import threading
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+MODES = ('record', 'replay', 'auto')
+DEFAULT_MATCH_ON = ('method', 'url', 'body')
+FORMAT_VERSION = 1
+
+
+class CassetteMiss(Exception):
+    pass
+
+
+class CassetteStreamError(Exception):
+    pass
+
+
+def normalize_url(url):
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, query, ''))
+
+
+def normalize_body(body):
+    if body is None:
+        return ''
+    if isinstance(body, dict):
+        return json.dumps(body, sort_keys=True, separators=(',', ':'))
+    if isinstance(body, bytes):
+        body = body.decode('utf-8', 'replace')
+    try:
+        return json.dumps(json.loads(body), sort_keys=True, separators=(',', ':'))
+    except ValueError:
+        return str(body)
+
+
+def parse_match_on(match_on):
+    if isinstance(match_on, str):
+        match_on = match_on.split(',')
+    rules = tuple(rule.strip() for rule in match_on if rule.strip())
+    for rule in rules:
+        if rule not in ('method', 'url', 'path', 'body') and not rule.lower().startswith('header:'):
+            raise ValueError('Unknown cassette match rule: {}'.format(rule))
+    return rules
+
+
+class Cassette(object):
+    """
+    Recorded interactions of one cassette file
+
+    Parameters:
+        - path (str): Cassette file path
+        - mode (str): record, replay or auto
+        - match_on (str|iterable): Match rules
+    """
+
+    def __init__(self, path, mode='auto', match_on=DEFAULT_MATCH_ON):
+        if mode not in MODES:
+            raise ValueError('Cassette mode must be one of {}, got {}'.format(', '.join(MODES), mode))
+        self.path = path
+        self.mode = mode
+        self.match_on = parse_match_on(match_on)
+        self.interactions = {}
+        self.dirty = False
+        self.played = {}
+        self._lock = threading.Lock()
+        if mode != 'record' and os.path.exists(path):
+            self._load()
+        elif mode == 'replay':
+            raise IOError('Cassette file not found: {}'.format(path))
+
+    def _load(self):
+        with gzip.open(self.path, 'rt', encoding='utf-8') as cassette_file:
+            data = json.load(cassette_file)
+        if tuple(data.get('match_on', ())) != self.match_on:
+            raise ValueError('Cassette {} was recorded with match rules {}, not {}'.format(
+                self.path, ','.join(data.get('match_on', ())), ','.join(self.match_on)))
+        self.interactions = data['interactions']
+
+    def save(self):
+        if not self.dirty:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        temp_path = '{}.{}.tmp'.format(self.path, os.getpid())
+        with gzip.open(temp_path, 'wt', encoding='utf-8') as cassette_file:
+            json.dump({'version': FORMAT_VERSION, 'match_on': list(self.match_on),
+                       'interactions': self.interactions}, cassette_file, separators=(',', ':'))
+        os.replace(temp_path, self.path)
+        self.dirty = False
+
+    def key(self, method, url, headers, body):
+        headers = {name.lower(): value for name, value in (headers or {}).items()}
+        fields = []
+        for rule in self.match_on:
+            if rule == 'method':
+                fields.append(method.upper())
+            elif rule == 'url':
+                fields.append(normalize_url(url))
+            elif rule == 'path':
+                fields.append(normalize_url(url).split('?', 1)[0])
+            elif rule == 'body':
+                fields.append(normalize_body(body))
+            else:
+                fields.append(str(headers.get(rule.split(':', 1)[1].strip().lower(), '')))
+        return hashlib.sha1('\n'.join(fields).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _to_response(recorded):
+        response = Response()
+        response._content = base64.b64decode(recorded['content'])
+        response._content_consumed = True
+        response.status_code = recorded['status_code']
+        response.headers = CaseInsensitiveDict(recorded['headers'])
+        response.url = recorded['url']
+        response.encoding = recorded.get('encoding')
+        return response
+
+    def _record(self, key, method, url, response):
+        recorded = {
+            'method': method.upper(),
+            'url': url,
+            'status_code': response.status_code,
+            'headers': dict(response.headers),
+            'encoding': response.encoding,
+            'content': base64.b64encode(response.content).decode('ascii'),
+        }
+        with self._lock:
+            self.interactions.setdefault(key, []).append(recorded)
+            self.dirty = True
+
+    def play(self, method, url, headers, body, send, stream=False):
+        """
+        Returns response for request, replayed or obtained from `send()` depending on mode
+
+        Repeated identical requests replay recorded responses in recording order, the last one
+        is repeated once all are played. A `stream` request that is not replayed raises
+        CassetteStreamError instead of being sent and recorded.
+        """
+        key = self.key(method, url, headers, body)
+        if self.mode != 'record':
+            with self._lock:
+                recorded = self.interactions.get(key)
+                if recorded:
+                    position = self.played.get(key, 0)
+                    self.played[key] = position + 1
+                    return self._to_response(recorded[min(position, len(recorded) - 1)])
+            if self.mode == 'replay':
+                raise CassetteMiss('No recorded interaction for {} {} in cassette {}'.format(
+                    method.upper(), url, self.path))
+        if stream:
+            raise CassetteStreamError('Streamed response of {} {} cannot be recorded in cassette {}, record it with '
+                                      'a non streamed request or eject the cassette'.format(method.upper(), url,
+                                                                                            self.path))
+        response = send()
+        self._record(key, method, url, response)
+        return response
+
+
+active = None
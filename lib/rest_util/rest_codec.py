@@ -0,0 +1,66 @@
+"""
+JSON codec used by RestGeneric keywords.
+
+orjson is used when installed, stdlib json otherwise. Both parse response bytes directly, without
+decoding them to str first, and serialize request bodies straight to UTF-8 bytes. The backend can be
+forced with the RESTGENERIC_JSON_BACKEND environment variable (orjson or json).
+
+Differences of the orjson backend to stdlib json:
+    - documents orjson rejects, eg. with NaN or Infinity literals, are parsed again with stdlib json
+    - integers outside the 64 bit range are parsed as floats (stdlib json keeps them exact)
+    - NaN and Infinity floats are serialized as null (stdlib json writes NaN and Infinity)
+    - integers outside the 64 bit range and types orjson does not know are serialized by stdlib json
+"""
+import json
+import os
+
+BACKEND_ENV = 'RESTGENERIC_JSON_BACKEND'
+
+orjson = None
+if os.environ.get(BACKEND_ENV, 'orjson') == 'orjson':
+    try:
+        import orjson
+    except ImportError:
+        pass
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+JSONDecodeError = json.JSONDecodeError
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def loads(data):
+        """
+        Parses JSON `data` (bytes, bytearray, memoryview or str)
+        """
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # NaN and Infinity literals are accepted by stdlib json, invalid JSON fails there as well
+            if isinstance(data, memoryview):
+                data = data.tobytes()
+            return json.loads(data)
+
+    def dumps(obj):
+        """
+        Serializes `obj` to compact JSON as UTF-8 bytes
+        """
+        try:
+            return orjson.dumps(obj, option=_ORJSON_OPTIONS)
+        except TypeError:
+            # Types orjson does not know, eg. Decimal or integers over 64 bits
+            return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+else:
+    def loads(data):
+        """
+        Parses JSON `data` (bytes, bytearray, memoryview or str)
+        """
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+    def dumps(obj):
+        """
+        Serializes `obj` to compact JSON as UTF-8 bytes
+        """
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
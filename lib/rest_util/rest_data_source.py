@@ -0,0 +1,291 @@
+"""
+Process wide cache of parsed Excel/CSV test data files used by RestGeneric data keywords.
+
+Parsed data frames are kept in a size bounded LRU keyed by file path, sheet, read options and
+file modification time/size, so a changed file is re-read automatically. Optionally parsed frames
+are also written as pickle sidecar files to a directory, which later runs load instead of parsing
+the workbook again. The sidecar directory can be set with the RESTGENERIC_DATA_CACHE_DIR
+environment variable or RestGeneric.set_data_file_cache.
+
+Cached frames are shared between callers and must not be modified in place.
+
+For files too large to load at once, iter_csv_rows / iter_excel_rows stream only the requested
+columns in chunks.
+
+pandas (and openpyxl) are imported on first use, so importing this module stays cheap for suites
+that never read data files.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 16
+DEFAULT_CHUNK_SIZE = 10000
+SIDECAR_DIR_ENV = 'RESTGENERIC_DATA_CACHE_DIR'
+# Strings pandas parses as booleans or missing values
+_SPECIAL_STRINGS = frozenset(('True', 'TRUE', 'true', 'False', 'FALSE', 'false', '', '#N/A', '#N/A N/A', '#NA', '-1.#IND',
+                              '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN',
+                              'None', 'n/a', 'nan', 'null'))
+
+
+def _pandas():
+    import pandas
+
+    return pandas
+
+
+class DataSourceCache(object):
+    """
+    LRU cache of parsed data files
+
+    Parameters:
+        - max_entries (int): Maximum number of parsed frames kept in memory, 0 disables memory cache
+        - sidecar_dir (str): Directory for pickle sidecar files, `None` disables sidecars
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, sidecar_dir=None):
+        self.max_entries = int(max_entries)
+        self.sidecar_dir = sidecar_dir
+        self.hits = 0
+        self.misses = 0
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(kind, path, sheet_name, options):
+        stat = os.stat(path)
+        return (kind, os.path.abspath(path), sheet_name, tuple(sorted(options.items())),
+                stat.st_mtime_ns, stat.st_size)
+
+    def _sidecar_path(self, key):
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        name = '{}.{}.pkl'.format(os.path.basename(key[1]), digest[:16])
+        return os.path.join(self.sidecar_dir, name)
+
+    def _load(self, key, parse):
+        if self.sidecar_dir:
+            sidecar = self._sidecar_path(key)
+            if os.path.exists(sidecar):
+                try:
+                    return _pandas().read_pickle(sidecar)
+                except Exception:
+                    pass
+            frame = parse()
+            try:
+                os.makedirs(self.sidecar_dir, exist_ok=True)
+                temp_path = '{}.{}.tmp'.format(sidecar, os.getpid())
+                frame.to_pickle(temp_path)
+                os.replace(temp_path, sidecar)
+            except OSError:
+                pass
+            return frame
+        return parse()
+
+    def get(self, kind, path, sheet_name, options, parse):
+        """
+        Returns frame for `path` from cache, calling `parse` on a miss
+        """
+        key = self._key(kind, path, sheet_name, options)
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is not None:
+                self._frames.move_to_end(key)
+                self.hits += 1
+                return frame
+            self.misses += 1
+        frame = self._load(key, parse)
+        if self.max_entries > 0:
+            with self._lock:
+                for stale in [k for k in self._frames if k[:4] == key[:4]]:
+                    del self._frames[stale]
+                self._frames[key] = frame
+                while len(self._frames) > self.max_entries:
+                    self._frames.popitem(last=False)
+        return frame
+
+    def read_excel(self, excel_file_loc, sheet_name, **options):
+        return self.get('excel', excel_file_loc, sheet_name, options,
+                        lambda: _pandas().read_excel(excel_file_loc, sheet_name, **options))
+
+    def read_csv(self, csv_file_loc, **options):
+        return self.get('csv', csv_file_loc, None, options, lambda: _pandas().read_csv(csv_file_loc, **options))
+
+    def configure(self, max_entries=None, sidecar_dir=None):
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = int(max_entries)
+                while len(self._frames) > max(self.max_entries, 0):
+                    self._frames.popitem(last=False)
+            self.sidecar_dir = sidecar_dir or None
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self.hits = self.misses = 0
+
+
+def _is_blank(value):
+    return value is None or str(value) == 'nan'
+
+
+def _csv_column_dtypes(csv_file_loc, column_names, chunk_size):
+    """
+    Returns {column_name: dtype} pandas infers for `column_names` when parsing the whole file at once
+    """
+    kinds = {name: set() for name in column_names}
+    with _pandas().read_csv(csv_file_loc, usecols=column_names, chunksize=chunk_size) as reader:
+        for chunk in reader:
+            for name in column_names:
+                kinds[name].add(chunk[name].dtype.kind)
+    dtypes = {}
+    for name, found in kinds.items():
+        if found <= {'i'}:
+            dtypes[name] = 'int64'
+        elif found <= {'i', 'f'}:
+            dtypes[name] = 'float64'
+        elif found == {'b'}:
+            dtypes[name] = 'bool'
+        else:
+            dtypes[name] = object
+    return dtypes
+
+
+def iter_csv_rows(csv_file_loc, column_names, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Lazily yields rows of `csv_file_loc` as dicts holding only `column_names`
+
+    Only requested columns are parsed and at most `chunk_size` rows are held in memory. The file
+    is read twice: the first pass only determines the column types, so values have the same types
+    as from DataSourceCache.read_csv whatever the `chunk_size`. Blank cells are returned as `None`,
+    rows blank in all requested columns are skipped.
+    """
+    column_names = list(column_names)
+    chunk_size = int(chunk_size)
+    dtypes = _csv_column_dtypes(csv_file_loc, column_names, chunk_size)
+    reader = _pandas().read_csv(csv_file_loc, usecols=column_names, dtype=dtypes, chunksize=chunk_size)
+    with reader:
+        for chunk in reader:
+            columns = [chunk[name].tolist() for name in column_names]
+            for values in zip(*columns):
+                row = {name: None if _is_blank(value) else value for name, value in zip(column_names, values)}
+                if all(value is None for value in row.values()):
+                    continue
+                yield row
+
+
+def _excel_cell_value(cell):
+    """
+    Returns value of openpyxl `cell` the way pandas.read_excel passes it to its parser
+    """
+    if cell.value is None:
+        return ''
+    if cell.data_type == 'e':
+        return float('nan')
+    if cell.data_type == 'n':
+        value = int(cell.value)
+        return value if value == cell.value else float(cell.value)
+    return cell.value
+
+
+def _excel_chunks(excel_file_loc, sheet_name, column_names, chunk_size):
+    """
+    Yields lists of at most `chunk_size` rows of `column_names` (header row excluded) as pandas
+    reads the cells
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(excel_file_loc, read_only=True, data_only=True)
+    try:
+        rows = workbook[sheet_name].iter_rows()
+        header = [str(cell.value) if cell.value is not None else None for cell in next(rows, ())]
+        missing = [name for name in column_names if name not in header]
+        if missing:
+            raise KeyError('Columns not found in sheet "{}": {}'.format(sheet_name, ', '.join(missing)))
+        positions = [header.index(name) for name in column_names]
+        chunk = []
+        for row in rows:
+            chunk.append([_excel_cell_value(row[position]) if position < len(row) else ''
+                          for position in positions])
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    finally:
+        workbook.close()
+
+
+def _value_class(value):
+    """
+    Returns class of cell `value` that decides the column type pandas infers, eg. 'str-int' for '12'
+    """
+    if isinstance(value, str):
+        text = value.strip()
+        if text in _SPECIAL_STRINGS:
+            return 'str-' + text
+        for name, convert in (('int', int), ('float', float)):
+            try:
+                convert(text)
+                return 'str-' + name
+            except ValueError:
+                pass
+        return 'str'
+    if isinstance(value, float) and value != value:
+        return 'nan'
+    return type(value).__name__
+
+
+def _excel_representatives(excel_file_loc, sheet_name, column_names, chunk_size):
+    """
+    Returns rows holding one value of every value class found in each of `column_names`
+    """
+    found = [{} for _ in column_names]
+    for chunk in _excel_chunks(excel_file_loc, sheet_name, column_names, chunk_size):
+        for row in chunk:
+            for classes, value in zip(found, row):
+                classes.setdefault(_value_class(value), value)
+    columns = [list(classes.values()) or [''] for classes in found]
+    # Shorter columns are padded with a value they already hold, which does not change the inferred type
+    return [[values[min(position, len(values) - 1)] for values in columns]
+            for position in range(max(len(values) for values in columns))]
+
+
+def iter_excel_rows(excel_file_loc, sheet_name, column_names, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Lazily yields rows of `sheet_name` as dicts holding only `column_names`
+
+    The first row is the header row. The workbook is read in openpyxl read-only mode, at most
+    `chunk_size` rows are held in memory. The sheet is read twice: the first pass collects one cell
+    value of every kind found in each column, which is parsed with every chunk of the second pass,
+    so values have the same types as from DataSourceCache.read_excel whatever the `chunk_size` (eg.
+    floats in numeric columns with blank cells, Timestamps for dates). Blank cells are returned
+    as `None`, rows blank in all requested columns are skipped.
+    """
+    from pandas.io.parsers import TextParser
+
+    pandas = _pandas()
+    column_names = list(column_names)
+    chunk_size = int(chunk_size)
+    representatives = _excel_representatives(excel_file_loc, sheet_name, column_names, chunk_size)
+    for chunk in _excel_chunks(excel_file_loc, sheet_name, column_names, chunk_size):
+        frame = TextParser(representatives + chunk, names=column_names, header=None, skip_blank_lines=False).read()
+        columns = [frame[name].tolist()[len(representatives):] for name in column_names]
+        for values in zip(*columns):
+            row = {name: None if pandas.isna(value) else value for name, value in zip(column_names, values)}
+            if all(value is None for value in row.values()):
+                continue
+            yield row
+
+
+def iter_column_values(rows, column_name):
+    """
+    Yields non blank values of `column_name` from `rows` (Refer: iter_csv_rows, iter_excel_rows)
+    """
+    for row in rows:
+        value = row[column_name]
+        if not _is_blank(value):
+            yield value
+
+
+cache = DataSourceCache(sidecar_dir=os.environ.get(SIDECAR_DIR_ENV) or None)
@@ -0,0 +1,333 @@
+"""
+Iterative JSON diff engine behind RestGeneric.validate_json.
+
+Compares a JSON object against a reference object without recursion and without modifying
+either object:
+    - only keys of the reference object are validated, extra keys are ignored
+    - keys in the skip set are not validated at all, keys in PRESENCE_ONLY_KEYS only for presence
+    - lists of objects are aligned on a key of their elements (first common int key, else first
+      common str key of the first elements) through a hash index in linear time, or by position
+    - lists of plain values are not validated
+    - scalars must have the same type and string representation
+
+Mismatches are collected per call up to a configurable cap, or the comparison can stop at the
+first mismatch.
+"""
+from collections import deque
+
+PRESENCE_ONLY_KEYS = frozenset(['device_type'])
+DEFAULT_MAX_MISMATCHES = 100
+
+
+def parse_keys_to_skip(keys_to_skip):
+    """
+    Returns frozenset of key names from comma separated string (or iterable) `keys_to_skip`
+    """
+    if not keys_to_skip:
+        return frozenset()
+    if isinstance(keys_to_skip, str):
+        keys_to_skip = keys_to_skip.split(',')
+    return frozenset(key.strip() for key in keys_to_skip if key.strip())
+
+
+def format_path(path):
+    """
+    Formats linked path tuple (parent, label) as 'root -> key1 -> key2'
+    """
+    labels = []
+    while path is not None:
+        path, label = path
+        labels.append(label)
+    return ' -> '.join(reversed(labels))
+
+
+def find_alignment_key(reference_item, item_to_validate):
+    """
+    Returns key used to align two lists of objects, `None` if their first elements share no usable key
+    """
+    for value_type in (int, str):
+        for key, value in reference_item.items():
+            if key in item_to_validate and isinstance(value, value_type):
+                return key
+    return None
+
+
+def align_lists(list_to_validate, list_for_reference, key):
+    """
+    Pairs elements of both lists having the same value for `key`
+
+    Returns list of (element to validate or None, reference element, label) in reference order.
+    Elements without a (hashable) `key` value are paired by position among the leftovers.
+    """
+    buckets = {}
+    unkeyed = deque()
+    for item in list_to_validate:
+        try:
+            buckets.setdefault(item[key], deque()).append(item)
+        except (KeyError, TypeError, IndexError):
+            unkeyed.append(item)
+    pairs = []
+    for reference_item in list_for_reference:
+        try:
+            value = reference_item[key]
+            bucket = buckets.get(value)
+        except (KeyError, TypeError, IndexError):
+            pairs.append((unkeyed.popleft() if unkeyed else None, reference_item, '[]'))
+            continue
+        label = '[{}={}]'.format(key, value)
+        pairs.append((bucket.popleft() if bucket else None, reference_item, label))
+    return pairs
+
+
+class DiffResult(object):
+    __slots__ = ('match', 'mismatches', 'mismatch_count')
+
+    def __init__(self, match, mismatches, mismatch_count):
+        self.match = match
+        self.mismatches = mismatches
+        self.mismatch_count = mismatch_count
+
+    def report(self):
+        lines = list(self.mismatches)
+        if self.mismatch_count > len(lines):
+            lines.append('... {} more mismatches'.format(self.mismatch_count - len(lines)))
+        return '\n'.join(lines)
+
+
+class JsonDiff(object):
+    """
+    Reusable comparison settings
+
+    Parameters:
+        - keys_to_skip (str|iterable): Key names not validated (comma separated string or iterable)
+        - max_mismatches (int): Maximum number of mismatch messages kept, 0 keeps all
+        - first_mismatch_only (bool): Stop comparison at first mismatch
+    """
+
+    def __init__(self, keys_to_skip=(), max_mismatches=DEFAULT_MAX_MISMATCHES, first_mismatch_only=False):
+        self.keys_to_skip = parse_keys_to_skip(keys_to_skip)
+        self.max_mismatches = int(max_mismatches)
+        self.first_mismatch_only = first_mismatch_only
+
+    def compare(self, obj_to_validate, obj_for_reference, parent='root'):
+        """
+        Compares `obj_to_validate` against `obj_for_reference`
+
+        Returns:
+            - DiffResult
+        """
+        keys_to_skip = self.keys_to_skip
+        max_mismatches = self.max_mismatches
+        mismatches = []
+        count = 0
+        stack = [(obj_to_validate, obj_for_reference, (None, parent))]
+        while stack:
+            value, reference, path = stack.pop()
+            found = []
+            if isinstance(value, dict) and isinstance(reference, dict):
+                children = []
+                for key, reference_value in reference.items():
+                    if key in keys_to_skip:
+                        continue
+                    if key not in value:
+                        found.append('Missing key: {} -> {}'.format(format_path(path), key))
+                    elif key not in PRESENCE_ONLY_KEYS:
+                        children.append((value[key], reference_value, (path, key)))
+                stack.extend(reversed(children))
+            elif isinstance(value, list) and isinstance(reference, list):
+                if value and reference and isinstance(reference[0], dict) and isinstance(value[0], dict):
+                    key = find_alignment_key(reference[0], value[0])
+                    if key is None:
+                        pairs = [(value[index] if index < len(value) else None, reference_item, '[{}]'.format(index))
+                                 for index, reference_item in enumerate(reference)]
+                    else:
+                        pairs = align_lists(value, reference, key)
+                    children = []
+                    for item, reference_item, label in pairs:
+                        if item is None:
+                            found.append('Missing list item: {}{}'.format(format_path(path), label))
+                        else:
+                            children.append((item, reference_item, (path[0], path[1] + label)))
+                    stack.extend(reversed(children))
+            else:
+                if type(value) != type(reference):
+                    found.append('Data types mismatch for key: {}'.format(format_path(path)))
+                if str(value) != str(reference):
+                    found.append('Values mismatch for key: {}'.format(format_path(path)))
+            if found:
+                for message in found:
+                    count += 1
+                    if not max_mismatches or len(mismatches) < max_mismatches:
+                        mismatches.append(message)
+                if self.first_mismatch_only:
+                    break
+        return DiffResult(count == 0, mismatches, count)
+
+
+def parse_tolerances(tolerances):
+    """
+    Returns {key name: absolute tolerance} from dict or comma separated 'key=tolerance' string
+    """
+    if not tolerances:
+        return {}
+    if isinstance(tolerances, str):
+        tolerances = dict(item.split('=', 1) for item in tolerances.split(',') if item.strip())
+    return {key.strip(): float(value) for key, value in tolerances.items()}
+
+
+_DICT, _LIST, _SCALAR = 0, 1, 2
+_NO_KEY = object()
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class CompiledValidator(object):
+    """
+    Validator compiled once from a reference object and reused for many objects to validate
+
+    Compilation walks the reference object once: skipped keys are dropped, reference values are
+    converted to strings and the alignment keys of lists of objects are extracted in advance, so
+    every validation only walks the object to validate. Results are identical to JsonDiff, except
+    that numeric values of keys listed in `tolerances` match when they differ by at most the tolerance.
+
+    Parameters:
+        - obj_for_reference (object): Json object to validate against
+        - keys_to_skip (str|iterable): Key names not validated
+        - tolerances (dict|str): Absolute tolerance by key name for numeric values (eg. 'price=0.01')
+        - max_mismatches (int): Maximum number of mismatch messages kept, 0 keeps all
+        - first_mismatch_only (bool): Stop validation at first mismatch
+    """
+
+    def __init__(self, obj_for_reference, keys_to_skip=(), tolerances=None, max_mismatches=DEFAULT_MAX_MISMATCHES,
+                 first_mismatch_only=False):
+        self.keys_to_skip = parse_keys_to_skip(keys_to_skip)
+        self.tolerances = parse_tolerances(tolerances)
+        self.max_mismatches = int(max_mismatches)
+        self.first_mismatch_only = first_mismatch_only
+        self.root = self._compile(obj_for_reference)
+
+    def __repr__(self):
+        return '<CompiledValidator skip={} tolerances={}>'.format(sorted(self.keys_to_skip), self.tolerances)
+
+    def _compile(self, reference):
+        root = []
+        stack = [(reference, None, root)]
+        while stack:
+            reference, tolerance, target = stack.pop()
+            if isinstance(reference, dict):
+                members = []
+                for key, reference_value in reference.items():
+                    if key in self.keys_to_skip:
+                        continue
+                    if key in PRESENCE_ONLY_KEYS:
+                        members.append((key, None))
+                        continue
+                    slot = []
+                    members.append((key, slot))
+                    stack.append((reference_value, self.tolerances.get(key), slot))
+                target.append((_DICT, members, reference))
+            elif isinstance(reference, list):
+                items = []
+                candidates = []
+                if reference and isinstance(reference[0], dict):
+                    for value_type in (int, str):
+                        for key, value in reference[0].items():
+                            if isinstance(value, value_type):
+                                candidates.append((key, [item.get(key, _NO_KEY) if isinstance(item, dict)
+                                                         else _NO_KEY for item in reference]))
+                    for reference_item in reference:
+                        slot = []
+                        items.append(slot)
+                        stack.append((reference_item, None, slot))
+                target.append((_LIST, items, candidates, reference))
+            else:
+                target.append((_SCALAR, type(reference), str(reference), tolerance, reference))
+        return root[0]
+
+    @staticmethod
+    def _align(value, node):
+        items, candidates = node[1], node[2]
+        first = value[0]
+        for key, reference_keys in candidates:
+            if key in first:
+                break
+        else:
+            return [(value[index] if index < len(value) else None, slot[0], '[{}]'.format(index))
+                    for index, slot in enumerate(items)]
+        buckets = {}
+        unkeyed = deque()
+        for item in value:
+            try:
+                buckets.setdefault(item[key], deque()).append(item)
+            except (KeyError, TypeError, IndexError):
+                unkeyed.append(item)
+        pairs = []
+        for slot, reference_key in zip(items, reference_keys):
+            try:
+                bucket = buckets.get(reference_key) if reference_key is not _NO_KEY else _NO_KEY
+            except TypeError:
+                bucket = _NO_KEY
+            if bucket is _NO_KEY:
+                pairs.append((unkeyed.popleft() if unkeyed else None, slot[0], '[]'))
+            else:
+                pairs.append((bucket.popleft() if bucket else None, slot[0], '[{}={}]'.format(key, reference_key)))
+        return pairs
+
+    def validate(self, obj_to_validate, parent='root'):
+        """
+        Validates `obj_to_validate` against compiled reference
+
+        Returns:
+            - DiffResult
+        """
+        max_mismatches = self.max_mismatches
+        mismatches = []
+        count = 0
+        stack = [(obj_to_validate, self.root, (None, parent))]
+        while stack:
+            value, node, path = stack.pop()
+            kind = node[0]
+            found = []
+            if kind == _DICT and isinstance(value, dict):
+                children = []
+                for key, slot in node[1]:
+                    if key not in value:
+                        found.append('Missing key: {} -> {}'.format(format_path(path), key))
+                    elif slot is not None:
+                        children.append((value[key], slot[0], (path, key)))
+                stack.extend(reversed(children))
+            elif kind == _LIST and isinstance(value, list):
+                if value and node[1] and isinstance(value[0], dict):
+                    children = []
+                    for item, item_node, label in self._align(value, node):
+                        if item is None:
+                            found.append('Missing list item: {}{}'.format(format_path(path), label))
+                        else:
+                            children.append((item, item_node, (path[0], path[1] + label)))
+                    stack.extend(reversed(children))
+            elif kind == _SCALAR:
+                reference_type, reference_str, tolerance, reference = node[1:]
+                if tolerance is not None and _is_number(value) and _is_number(reference):
+                    if abs(value - reference) > tolerance:
+                        found.append('Values mismatch for key: {}'.format(format_path(path)))
+                else:
+                    if type(value) != reference_type:
+                        found.append('Data types mismatch for key: {}'.format(format_path(path)))
+                    if str(value) != reference_str:
+                        found.append('Values mismatch for key: {}'.format(format_path(path)))
+            else:
+                reference = node[-1]
+                if type(value) != type(reference):
+                    found.append('Data types mismatch for key: {}'.format(format_path(path)))
+                if str(value) != str(reference):
+                    found.append('Values mismatch for key: {}'.format(format_path(path)))
+            if found:
+                for message in found:
+                    count += 1
+                    if not max_mismatches or len(mismatches) < max_mismatches:
+                        mismatches.append(message)
+                if self.first_mismatch_only:
+                    break
+        return DiffResult(count == 0, mismatches, count)
@@ -0,0 +1,233 @@
+"""
+In-memory index over a list of JSON objects, used by RestGeneric.get_filtered_object_list.
+
+Objects are indexed on key paths (Refer: rest_json_path) with
+    - a hash index per key path for equality lookups
+    - a hash index per composite key ('key1+key2') for lookups on several keys at once
+    - a sorted index per key path for range queries on numeric values, built on first use
+Objects can be added and removed incrementally. Lookups return objects in insertion order, like
+filtering the original list would.
+"""
+from bisect import bisect_left, bisect_right, insort
+
+import rest_json_path
+
+COMPOSITE_SEPARATOR = '+'
+_MISSING = object()
+
+
+def _value(obj, key_path):
+    try:
+        return key_path.resolve(obj)
+    except (KeyError, IndexError, TypeError):
+        return _MISSING
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class JsonIndex(object):
+    """
+    Index over JSON objects
+
+    Parameters:
+        - list_of_objects (iterable): JSON objects to index
+        - key_paths (iterable): Key paths to index, 'key1+key2' indexes a composite key
+    """
+
+    def __init__(self, list_of_objects, key_paths):
+        self._paths = {}
+        self._composites = {}
+        for spec in key_paths:
+            if COMPOSITE_SEPARATOR in spec:
+                parts = tuple(part.strip() for part in spec.split(COMPOSITE_SEPARATOR))
+                self._composites[frozenset(parts)] = (parts, {})
+                for part in parts:
+                    self._paths.setdefault(part, {})
+            else:
+                self._paths.setdefault(spec.strip(), {})
+        if not self._paths:
+            raise ValueError('At least one key path is required to build a JSON index')
+        self._compiled = {path: rest_json_path.compile_key_path(path) for path in self._paths}
+        self._sorted = {}
+        self._objects = {}
+        self._slots_by_identity = {}
+        self._next_slot = 0
+        for obj in list_of_objects:
+            self.insert(obj)
+
+    def __len__(self):
+        return len(self._objects)
+
+    def __iter__(self):
+        return iter(self.objects())
+
+    def __repr__(self):
+        return '<JsonIndex objects={} key_paths={}>'.format(len(self._objects), sorted(self._paths))
+
+    @property
+    def key_paths(self):
+        return sorted(self._paths)
+
+    def objects(self):
+        return [self._objects[slot] for slot in sorted(self._objects)]
+
+    def _values(self, obj):
+        return {path: _value(obj, compiled) for path, compiled in self._compiled.items()}
+
+    @staticmethod
+    def _add(table, key, slot):
+        try:
+            table.setdefault(key, set()).add(slot)
+        except TypeError:
+            pass
+
+    @staticmethod
+    def _discard(table, key, slot):
+        try:
+            slots = table.get(key)
+        except TypeError:
+            return
+        if slots is not None:
+            slots.discard(slot)
+            if not slots:
+                del table[key]
+
+    def insert(self, obj):
+        """
+        Adds `obj` to the index
+        """
+        slot = self._next_slot
+        self._next_slot += 1
+        self._objects[slot] = obj
+        self._slots_by_identity.setdefault(id(obj), []).append(slot)
+        values = self._values(obj)
+        for path, value in values.items():
+            if value is _MISSING:
+                continue
+            self._add(self._paths[path], value, slot)
+            if path in self._sorted and _is_number(value):
+                insort(self._sorted[path], (value, slot))
+        for parts, table in self._composites.values():
+            key = tuple(values[part] for part in parts)
+            if _MISSING not in key:
+                self._add(table, key, slot)
+
+    def _find_slot(self, obj):
+        slots = self._slots_by_identity.get(id(obj))
+        if slots:
+            return slots[0]
+        for path, compiled in self._compiled.items():
+            value = _value(obj, compiled)
+            if value is _MISSING:
+                continue
+            try:
+                candidates = self._paths[path].get(value, ())
+            except TypeError:
+                continue
+            for slot in sorted(candidates):
+                if self._objects[slot] == obj:
+                    return slot
+            return None
+        return next((slot for slot in sorted(self._objects) if self._objects[slot] == obj), None)
+
+    def remove(self, obj):
+        """
+        Removes `obj` (same object, or else first equal object) from the index
+
+        Returns:
+            - bool: `True` if an object was removed
+        """
+        slot = self._find_slot(obj)
+        if slot is None:
+            return False
+        stored = self._objects.pop(slot)
+        identity_slots = self._slots_by_identity[id(stored)]
+        identity_slots.remove(slot)
+        if not identity_slots:
+            del self._slots_by_identity[id(stored)]
+        values = self._values(stored)
+        for path, value in values.items():
+            if value is _MISSING:
+                continue
+            self._discard(self._paths[path], value, slot)
+            if path in self._sorted and _is_number(value):
+                entries = self._sorted[path]
+                position = bisect_left(entries, (value, slot))
+                if position < len(entries) and entries[position] == (value, slot):
+                    del entries[position]
+        for parts, table in self._composites.values():
+            self._discard(table, tuple(values[part] for part in parts), slot)
+        return True
+
+    def _slots_for(self, filters):
+        """
+        Returns candidate slots for `filters` using indexes, and the filters indexes could not answer
+        """
+        remaining = dict(filters)
+        candidate_sets = []
+        for key_set, (parts, table) in self._composites.items():
+            if key_set <= set(remaining):
+                try:
+                    candidate_sets.append(table.get(tuple(remaining[part] for part in parts), set()))
+                except TypeError:
+                    continue
+                for part in parts:
+                    remaining.pop(part)
+        for path in list(remaining):
+            if path in self._paths:
+                try:
+                    candidate_sets.append(self._paths[path].get(remaining[path], set()))
+                except TypeError:
+                    continue
+                remaining.pop(path)
+        if not candidate_sets:
+            return None, remaining
+        candidate_sets.sort(key=len)
+        slots = set(candidate_sets[0])
+        for other in candidate_sets[1:]:
+            if not slots:
+                break
+            slots &= other
+        return slots, remaining
+
+    def lookup(self, **filters):
+        """
+        Returns objects matching all `filters` ({key_path: value}), in insertion order
+
+        Filters on key paths that are not indexed are applied to the indexed candidates one by one.
+        """
+        slots, remaining = self._slots_for(filters)
+        if slots is None:
+            slots = self._objects.keys()
+        result = [self._objects[slot] for slot in sorted(slots)]
+        if remaining:
+            compiled = [(rest_json_path.compile_key_path(path), value) for path, value in remaining.items()]
+            result = [obj for obj in result
+                      if all(rest_json_path.get_value(obj, key_path) == value for key_path, value in compiled)]
+        return result
+
+    def range(self, key_path, min_value=None, max_value=None, include_min=True, include_max=True):
+        """
+        Returns objects whose numeric value at `key_path` is within [min_value, max_value], in insertion order
+        """
+        if key_path not in self._paths:
+            raise ValueError('Key path "{}" is not indexed, indexed key paths: {}'.format(key_path, self.key_paths))
+        entries = self._sorted.get(key_path)
+        if entries is None:
+            # Values of the objects themselves, hash keys would merge True, 1 and 1.0
+            compiled = self._compiled[key_path]
+            entries = sorted((value, slot) for value, slot in
+                             ((_value(obj, compiled), slot) for slot, obj in self._objects.items())
+                             if _is_number(value))
+            self._sorted[key_path] = entries
+        low = 0
+        if min_value is not None:
+            low = bisect_left(entries, (min_value,)) if include_min else \
+                bisect_right(entries, (min_value, float('inf')))
+        high = len(entries)
+        if max_value is not None:
+            high = bisect_right(entries, (max_value, float('inf'))) if include_max else \
+                bisect_left(entries, (max_value,))
+        return [self._objects[slot] for slot in sorted(slot for _, slot in entries[low:high])]
@@ -0,0 +1,120 @@
+"""
+Compiled JSON key paths used by RestGeneric JSON keywords.
+
+Key path syntax is the period ('.') separated format of RestGeneric.get_value_by_key_from_json
+(eg. key1.key2.key3) extended with list indices and wildcards:
+    - data.0.name or data[0].name: element 0 of list `data`
+    - data.-1.name or data[-1].name: last element of list `data`
+    - data.*.id or data[*].id: `id` of every element of list (or every value of dict) `data`
+
+Numeric segments index into lists and look up dict keys as before. Dict keys that contain
+brackets or are '*' (eg. a key literally named items[0]) can no longer be addressed, since those
+segments are parsed as list indices and wildcards.
+
+Compiled paths are cached, so repeated lookups of the same path skip parsing entirely.
+"""
+import re
+from functools import lru_cache
+
+WILDCARD = '*'
+
+_SEGMENT = re.compile(r'([^\[\]]*)((?:\[[^\[\]]*\])*)$')
+_INDEX = re.compile(r'\[([^\[\]]*)\]')
+
+
+class KeyPath(object):
+    """
+    Pre-parsed key path
+
+    Every step is a tuple (key, index) where `key` is used on dicts and `index` (int or None)
+    on lists; a `key` equal to '*' is a wildcard.
+    """
+    __slots__ = ('path', 'steps', 'has_wildcard')
+
+    def __init__(self, path, steps):
+        self.path = path
+        self.steps = steps
+        self.has_wildcard = any(key == WILDCARD for key, _ in steps)
+
+    def __repr__(self):
+        return 'KeyPath({!r})'.format(self.path)
+
+    @staticmethod
+    def _step(data, key, index):
+        if index is not None and isinstance(data, (list, tuple)):
+            return data[index]
+        return data[key]
+
+    def resolve(self, data):
+        """
+        Returns value at this path in `data`
+
+        Raises KeyError/IndexError/TypeError like chained `[]` lookups. A wildcard step expands to a
+        list; elements missing the remaining path are left out of that list.
+        """
+        if not self.has_wildcard:
+            for key, index in self.steps:
+                data = self._step(data, key, index)
+            return data
+        values = [data]
+        expanded = False
+        for key, index in self.steps:
+            if key == WILDCARD:
+                next_values = []
+                for value in values:
+                    if isinstance(value, dict):
+                        next_values.extend(value.values())
+                    elif isinstance(value, (list, tuple)):
+                        next_values.extend(value)
+                values = next_values
+                expanded = True
+            elif expanded:
+                next_values = []
+                for value in values:
+                    try:
+                        next_values.append(self._step(value, key, index))
+                    except (KeyError, IndexError, TypeError):
+                        pass
+                values = next_values
+            else:
+                values = [self._step(values[0], key, index)]
+        return values
+
+
+def _parse_index(token):
+    try:
+        return int(token)
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def compile_key_path(key_path):
+    """
+    Parses `key_path` into a cached KeyPath object
+    """
+    steps = []
+    for segment in str(key_path).split('.'):
+        match = _SEGMENT.match(segment)
+        if match is None or (not match.group(2)):
+            steps.append((segment, _parse_index(segment)))
+            continue
+        if match.group(1):
+            steps.append((match.group(1), _parse_index(match.group(1))))
+        for token in _INDEX.findall(match.group(2)):
+            token = token.strip().strip('\'"')
+            steps.append((token, _parse_index(token)))
+    return KeyPath(key_path, tuple(steps))
+
+
+def get_value(json_data, key_path):
+    """
+    Returns value at `key_path` of `json_data`, or the missing key name when a key is not found
+    (same contract as RestGeneric.get_value_by_key_from_json)
+    """
+    if not isinstance(key_path, KeyPath):
+        key_path = compile_key_path(key_path)
+    try:
+        return key_path.resolve(json_data)
+    except KeyError as e:
+        return e.args[0]
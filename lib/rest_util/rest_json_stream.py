@@ -0,0 +1,311 @@
+"""
+Incremental JSON reader for very large response bodies.
+
+JsonStream reads a JSON document from an iterator of byte chunks (eg. requests
+`Response.iter_content`) and only materializes the parts that are asked for:
+    - get_value / get_values decode the values at given key paths and skip everything else
+    - iter_items yields elements of an array one at a time
+
+Memory use is bounded by the size of the largest single value decoded, not by the document size.
+Key paths follow rest_json_path syntax without wildcards and negative indices, which cannot be
+resolved without reading ahead. A stream can be read only once.
+"""
+import re
+
+import rest_codec
+import rest_json_path
+
+_WHITESPACE = b' \t\r\n'
+_STRUCTURAL = re.compile(b'["\\[\\]{}]')
+_STRING_SPECIAL = re.compile(b'["\\\\]')
+_SCALAR_END = re.compile(b'[,\\]}\\s]')
+
+
+class _Reader(object):
+    """
+    Byte buffer over a chunk iterator, dropping consumed data whenever a new chunk is read
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self.buf = b''
+        self.pos = 0
+        self.eof = False
+        self._capture_start = None
+        self._captured = []
+
+    def fill(self):
+        """
+        Appends next chunk to buffer, returns False at end of stream
+        """
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            if self._capture_start is not None:
+                self._captured.append(self.buf[self._capture_start:self.pos])
+                self._capture_start = 0
+            self.buf = self.buf[self.pos:] + chunk
+            self.pos = 0
+            return True
+        self.eof = True
+        return False
+
+    def peek(self):
+        while True:
+            buf, pos, length = self.buf, self.pos, len(self.buf)
+            while pos < length and buf[pos] in _WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < length:
+                return buf[pos:pos + 1]
+            if not self.fill():
+                return b''
+
+    def expect(self, token):
+        if self.peek() != token:
+            raise ValueError('Invalid JSON: expected {!r} at byte {!r}'.format(token, self.peek()))
+        self.pos += 1
+
+    def _scan_string(self):
+        # self.pos is on the opening quote
+        offset = 1
+        while True:
+            match = _STRING_SPECIAL.search(self.buf, self.pos + offset)
+            if match is None or (match.group() == b'\\' and match.end() >= len(self.buf)):
+                offset = (match.start() if match is not None else len(self.buf)) - self.pos
+                if not self.fill():
+                    raise ValueError('Invalid JSON: unterminated string')
+                continue
+            if match.group() == b'\\':
+                offset = match.end() + 1 - self.pos
+                continue
+            self.pos = match.end()
+            return
+
+    def _scan_container(self):
+        # self.pos is on the opening bracket
+        depth = 0
+        while True:
+            match = _STRUCTURAL.search(self.buf, self.pos)
+            if match is None:
+                self.pos = len(self.buf)
+                if not self.fill():
+                    raise ValueError('Invalid JSON: unterminated container')
+                continue
+            token = match.group()
+            self.pos = match.start()
+            if token == b'"':
+                self._scan_string()
+                continue
+            self.pos += 1
+            if token in (b'{', b'['):
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def _scan_scalar(self):
+        while True:
+            match = _SCALAR_END.search(self.buf, self.pos)
+            if match is not None:
+                self.pos = match.start()
+                return
+            if not self.fill():
+                self.pos = len(self.buf)
+                return
+
+    def skip_value(self):
+        token = self.peek()
+        if token == b'"':
+            self._scan_string()
+        elif token in (b'{', b'['):
+            self._scan_container()
+        elif token:
+            self._scan_scalar()
+        else:
+            raise ValueError('Invalid JSON: unexpected end of stream')
+
+    def read_value(self):
+        self.peek()
+        self._capture_start = self.pos
+        self._captured = []
+        try:
+            self.skip_value()
+            self._captured.append(self.buf[self._capture_start:self.pos])
+        finally:
+            self._capture_start = None
+        raw, self._captured = b''.join(self._captured), []
+        return rest_codec.loads(raw)
+
+    def read_key(self):
+        key = self.read_value()
+        self.expect(b':')
+        return key
+
+    def iter_members(self):
+        """
+        Iterates an object or array at current position, yielding its keys (str) or indices (int)
+        with the reader positioned on the member value. Members not read by the caller are skipped.
+        """
+        opening = self.peek()
+        closing = b'}' if opening == b'{' else b']'
+        self.pos += 1
+        index = 0
+        while True:
+            token = self.peek()
+            if token == closing:
+                self.pos += 1
+                return
+            if index:
+                self.expect(b',')
+                self.peek()
+            member = self.read_key() if opening == b'{' else index
+            buf, pos = self.buf, self.pos
+            yield member
+            if self.buf is buf and self.pos == pos:
+                self.skip_value()
+            index += 1
+
+
+def _matches(step, member):
+    key, index = step
+    if isinstance(member, int):
+        return index == member
+    return key == member
+
+
+def _check_streamable(key_path):
+    for key, index in key_path.steps:
+        if key == rest_json_path.WILDCARD or (index is not None and index < 0):
+            raise ValueError('Key path "{}" is not supported on JSON streams'.format(key_path.path))
+    return key_path
+
+
+class _Node(object):
+    __slots__ = ('targets', 'children', 'paths')
+
+    def __init__(self):
+        self.targets = []
+        self.children = {}
+        self.paths = []
+
+
+def _build_trie(compiled):
+    root = _Node()
+    for path_id, key_path in enumerate(compiled):
+        node = root
+        node.paths.append((path_id, key_path))
+        for step in key_path.steps:
+            node = node.children.setdefault(step, _Node())
+            node.paths.append((path_id, key_path))
+        node.targets.append(path_id)
+    return root
+
+
+class JsonStream(object):
+    """
+    Single pass lazy view over a JSON document delivered as byte chunks
+
+    Parameters:
+        - chunks (iterable): Iterable of bytes, eg. `response.iter_content(65536)`
+        - on_close (callable): Called once the stream is consumed or closed, eg. `response.close`
+    """
+
+    def __init__(self, chunks, on_close=None):
+        self._reader = _Reader(chunks)
+        self._on_close = on_close
+        self.consumed = False
+
+    def __repr__(self):
+        return '<JsonStream {}>'.format('consumed' if self.consumed else 'unread')
+
+    def __iter__(self):
+        return self.iter_items()
+
+    def _start(self):
+        if self.consumed:
+            raise RuntimeError('JSON stream has already been read')
+        self.consumed = True
+        return self._reader
+
+    def close(self):
+        self.consumed = True
+        if self._on_close is not None:
+            on_close, self._on_close = self._on_close, None
+            on_close()
+
+    def _collect(self, node, depth, found, reached):
+        """
+        Decodes requested values below `node` from value at reader position into `found`,
+        returns False once all values are found and reading can stop
+        """
+        reader = self._reader
+        for path_id, _ in node.paths:
+            reached[path_id] = depth
+        if node.targets:
+            value = reader.read_value()
+            for path_id, key_path in node.paths:
+                try:
+                    found[path_id] = rest_json_path.KeyPath(key_path.path, key_path.steps[depth:]).resolve(value)
+                except KeyError as e:
+                    found[path_id] = e.args[0]
+            return len(found) < len(reached)
+        if reader.peek() not in (b'{', b'['):
+            reader.skip_value()
+            return True
+        pending = dict(node.children)
+        for member in reader.iter_members():
+            if not pending:
+                continue
+            step = next((s for s in pending if _matches(s, member)), None)
+            if step is not None and not self._collect(pending.pop(step), depth + 1, found, reached):
+                return False
+        return True
+
+    def get_values(self, key_paths):
+        """
+        Returns values at `key_paths` reading the stream once, missing keys return the key name
+        """
+        compiled = [_check_streamable(rest_json_path.compile_key_path(k)) for k in key_paths]
+        self._start()
+        found, reached = {}, dict.fromkeys(range(len(compiled)), 0)
+        try:
+            if compiled:
+                self._collect(_build_trie(compiled), 0, found, reached)
+        finally:
+            self.close()
+        return [found[i] if i in found else compiled[i].steps[reached[i]][0] for i in range(len(compiled))]
+
+    def get_value(self, key_path):
+        """
+        Returns value at `key_path`, or the missing key name (Refer: RestGeneric.get_value_by_key_from_json)
+        """
+        return self.get_values([key_path])[0]
+
+    def iter_items(self, key_path=''):
+        """
+        Lazily yields elements of the array (or values of the object) at `key_path`
+
+        An empty `key_path` iterates the root value. Yields nothing if `key_path` does not exist.
+        """
+        steps = _check_streamable(rest_json_path.compile_key_path(key_path)).steps if key_path else ()
+        reader = self._start()
+        try:
+            if self._navigate(reader, steps) and reader.peek() in (b'{', b'['):
+                for _ in reader.iter_members():
+                    yield reader.read_value()
+        finally:
+            self.close()
+
+    @staticmethod
+    def _navigate(reader, steps):
+        for step in steps:
+            if reader.peek() not in (b'{', b'['):
+                return False
+            for member in reader.iter_members():
+                if _matches(step, member):
+                    break
+            else:
+                return False
+        return True
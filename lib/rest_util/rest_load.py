@@ -0,0 +1,198 @@
+"""
+Load generation for RestGeneric request templates.
+
+Replays one request at a fixed request rate (open loop) or with a fixed number of busy
+workers (closed loop) for a fixed duration and records latencies in an HDR style
+log-linear histogram.
+
+Can also be run from command line, e.g.
+    python lib/rest_util/rest_load.py --url http://127.0.0.1:8080/users --rps 200 --duration 30
+"""
+import argparse
+import itertools
+import json
+import threading
+import time
+
+
+class LatencyHistogram(object):
+    """
+    HDR style log-linear histogram of latencies recorded in microseconds
+
+    Every power of two range is split into 2 ** (sub_bucket_bits - 1) linear sub buckets, so
+    recorded values keep a relative precision better than 1 / 2 ** (sub_bucket_bits - 1)
+    with a memory footprint independent from the number of recorded values.
+    """
+
+    def __init__(self, sub_bucket_bits=8):
+        self.sub_bucket_bits = sub_bucket_bits
+        self._half = 1 << (sub_bucket_bits - 1)
+        self.counts = {}
+        self.total_count = 0
+        self.min = None
+        self.max = 0
+        self.sum = 0
+
+    def _index(self, value):
+        shift = value.bit_length() - self.sub_bucket_bits
+        if shift <= 0:
+            return value
+        return shift * self._half + (value >> shift)
+
+    def _value_at(self, index):
+        if index < 2 * self._half:
+            return index
+        shift = index // self._half - 1
+        return ((index - shift * self._half) << shift) + (1 << shift) // 2
+
+    def record(self, seconds):
+        value = max(0, int(seconds * 1e6))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.total_count += 1
+        self.sum += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total_count += other.total_count
+        self.sum += other.sum
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        self.max = max(self.max, other.max)
+
+    def percentile(self, percent):
+        """
+        Returns latency (seconds) at `percent` (0-100) of recorded values
+        """
+        if not self.total_count:
+            return 0.0
+        rank = max(1, int(round(self.total_count * float(percent) / 100.0)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._value_at(index), self.max) / 1e6
+        return self.max / 1e6
+
+    def mean(self):
+        return self.sum / 1e6 / self.total_count if self.total_count else 0.0
+
+
+def run_load(send, duration, concurrency=1, rps=0):
+    """
+    Calls `send` repeatedly for `duration` seconds and measures its latency
+
+    Parameters:
+        - send (callable): Executes one request and returns its status code, raises on failure
+        - duration (float): Test duration in seconds
+        - concurrency (int): Number of worker threads
+        - rps (float): Target requests per second over all workers, 0 runs each worker back to back.
+            With a target rate latency is measured from the scheduled send time, so a stalled
+            server shows up in the percentiles instead of silently lowering the request rate.
+
+    Returns:
+        - dict: Summary with request count, errors, throughput and latency percentiles (ms)
+    """
+    duration = float(duration)
+    concurrency = max(1, int(concurrency))
+    rps = float(rps or 0)
+    schedule = itertools.count()
+    results = []
+    results_lock = threading.Lock()
+    start = time.monotonic()
+    deadline = start + duration
+
+    def worker():
+        histogram = LatencyHistogram()
+        errors = 0
+        while True:
+            if rps:
+                scheduled = start + next(schedule) / rps
+                if scheduled >= deadline:
+                    break
+                delay = scheduled - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            else:
+                scheduled = time.monotonic()
+                if scheduled >= deadline:
+                    break
+            try:
+                status_code = send()
+                if status_code is None or int(status_code) >= 400:
+                    errors += 1
+            except Exception:
+                errors += 1
+            histogram.record(time.monotonic() - scheduled)
+        with results_lock:
+            results.append((histogram, errors))
+
+    threads = [threading.Thread(target=worker, name='rest-load-{}'.format(i)) for i in range(concurrency)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    histogram = LatencyHistogram()
+    errors = 0
+    for worker_histogram, worker_errors in results:
+        histogram.merge(worker_histogram)
+        errors += worker_errors
+    requests_sent = histogram.total_count
+    return {
+        'requests': requests_sent,
+        'errors': errors,
+        'error_rate': float(errors) / requests_sent if requests_sent else 0.0,
+        'duration': round(elapsed, 3),
+        'throughput': round(requests_sent / elapsed, 2) if elapsed else 0.0,
+        'min_ms': round((histogram.min or 0) / 1e3, 3),
+        'mean_ms': round(histogram.mean() * 1e3, 3),
+        'p50_ms': round(histogram.percentile(50) * 1e3, 3),
+        'p90_ms': round(histogram.percentile(90) * 1e3, 3),
+        'p99_ms': round(histogram.percentile(99) * 1e3, 3),
+        'max_ms': round(histogram.max / 1e3, 3),
+    }
+
+
+def format_summary(summary):
+    return ('Requests: {requests}, errors: {errors} ({error_rate:.2%}), duration: {duration}s, '
+            'throughput: {throughput} req/s\n'
+            'Latency (ms) min: {min_ms}, mean: {mean_ms}, p50: {p50_ms}, p90: {p90_ms}, '
+            'p99: {p99_ms}, max: {max_ms}').format(**summary)
+
+
+def main(argv=None):
+    from RestGeneric import RestGeneric
+
+    parser = argparse.ArgumentParser(description='Replay a REST request at a target rate or concurrency')
+    parser.add_argument('--url', required=True)
+    parser.add_argument('--method', default='GET')
+    parser.add_argument('--body', default=None, help='Request body for POST/PUT/PATCH')
+    parser.add_argument('--header', '-H', action='append', default=[], help='Header as "Name: value"')
+    parser.add_argument('--authorization-key', default=None)
+    parser.add_argument('--auth-key-name', default=None)
+    parser.add_argument('--rps', type=float, default=0, help='Target requests per second, 0 = unthrottled')
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--json', action='store_true', help='Print summary as JSON')
+    args = parser.parse_args(argv)
+
+    headers = dict(h.split(':', 1) for h in args.header) if args.header else None
+    if headers:
+        headers = {k.strip(): v.strip() for k, v in headers.items()}
+    summary = RestGeneric.run_load_test(args.method, args.url, args.body, headers, args.authorization_key,
+                                        args.auth_key_name, rps=args.rps, concurrency=args.concurrency,
+                                        duration=args.duration)
+    print(json.dumps(summary, indent=2) if args.json else format_summary(summary))
+    return 1 if summary['errors'] else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,302 @@
+"""
+Request timing breakdown and latency metrics of RestGeneric request keywords.
+
+Every request sent over the network is split into phases:
+    - dns: host name resolution
+    - connect: TCP connect
+    - tls: TLS handshake
+    - ttfb: request sent until response headers received (server time plus one round trip)
+    - download: response body read
+    - total: whole request
+
+dns, connect and tls are measured by the urllib3 connection classes of TimedHTTPAdapter and are 0
+on a reused keep-alive connection. Timings are aggregated per method, host and endpoint template
+(numeric, UUID and hex id path segments replaced with {id}) into counters and log-linear latency
+histograms (Refer: rest_load.LatencyHistogram), which can be exported as JSON or Prometheus text.
+"""
+import json
+import re
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError
+
+from rest_load import LatencyHistogram
+
+PHASES = ('dns', 'connect', 'tls', 'ttfb', 'download', 'total')
+PERCENTILES = (50, 90, 99)
+_ID_SEGMENT = re.compile(r'^(\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}|'
+                         r'[0-9a-fA-F]{16,})$')
+_local = threading.local()
+
+
+def endpoint_template(url):
+    """
+    Returns path of `url` with id like segments replaced by {id}, e.g. /public-api/users/{id}/posts
+    """
+    segments = urlsplit(url).path.split('/')
+    return '/'.join('{id}' if _ID_SEGMENT.match(segment) else segment for segment in segments) or '/'
+
+
+def _connection_phases():
+    return getattr(_local, 'phases', None)
+
+
+class _TimedConnectionMixin(object):
+
+    def _new_conn(self):
+        phases = _connection_phases()
+        if phases is None:
+            return super(_TimedConnectionMixin, self)._new_conn()
+        started = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(self._dns_host, self.port, 0, socket.SOCK_STREAM)
+        except socket.gaierror:
+            # Let urllib3 resolve again and raise its own NameResolutionError
+            return super(_TimedConnectionMixin, self)._new_conn()
+        resolved = time.perf_counter()
+        dns_host = self._dns_host
+        error = None
+        try:
+            for address in addresses:
+                self._dns_host = address[4][0]
+                try:
+                    sock = super(_TimedConnectionMixin, self)._new_conn()
+                    break
+                except ConnectTimeoutError as e:
+                    error = e
+            else:
+                raise error
+        finally:
+            self._dns_host = dns_host
+        phases['dns'] += resolved - started
+        phases['connect'] += time.perf_counter() - resolved
+        return sock
+
+    def connect(self):
+        phases = _connection_phases()
+        if phases is None:
+            return super(_TimedConnectionMixin, self).connect()
+        started = time.perf_counter()
+        before = phases['dns'] + phases['connect']
+        super(_TimedConnectionMixin, self).connect()
+        phases['tls'] += max(0.0, time.perf_counter() - started - (phases['dns'] + phases['connect'] - before))
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose connections record dns, connect and tls time of the current request
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super(TimedHTTPAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': TimedHTTPConnectionPool,
+                                                   'https': TimedHTTPSConnectionPool}
+
+
+class EndpointMetrics(object):
+    __slots__ = ('method', 'host', 'endpoint', 'requests', 'errors', 'status_codes', 'histograms')
+
+    def __init__(self, method, host, endpoint):
+        self.method = method
+        self.host = host
+        self.endpoint = endpoint
+        self.requests = 0
+        self.errors = 0
+        self.status_codes = {}
+        self.histograms = {phase: LatencyHistogram() for phase in PHASES}
+
+    def record(self, timings, status_code):
+        self.requests += 1
+        if status_code is None:
+            self.errors += 1
+        else:
+            self.status_codes[status_code] = self.status_codes.get(status_code, 0) + 1
+        for phase, seconds in timings.items():
+            if seconds is not None:
+                self.histograms[phase].record(seconds)
+
+    def to_dict(self):
+        phases = {}
+        for phase in PHASES:
+            histogram = self.histograms[phase]
+            if not histogram.total_count:
+                continue
+            summary = {'count': histogram.total_count, 'mean_ms': round(histogram.mean() * 1000, 3),
+                       'max_ms': round(histogram.max / 1000.0, 3)}
+            for percent in PERCENTILES:
+                summary['p{}_ms'.format(percent)] = round(histogram.percentile(percent) * 1000, 3)
+            phases[phase] = summary
+        return {'method': self.method, 'host': self.host, 'endpoint': self.endpoint, 'requests': self.requests,
+                'errors': self.errors, 'status_codes': {str(code): count for code, count in
+                                                        sorted(self.status_codes.items())},
+                'phases': phases}
+
+
+def _label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsRegistry(object):
+    """
+    Thread safe registry of request counters and phase latency histograms per endpoint
+
+    Scopes opened with `open_scope` receive the same records until closed, e.g. to summarize
+    a single suite while the registry keeps totals of the whole run.
+    """
+
+    def __init__(self):
+        self._endpoints = {}
+        self._scopes = []
+        self._lock = threading.Lock()
+
+    def record(self, method, url, timings, status_code):
+        """
+        Records one request
+
+        Parameters:
+            - timings (dict): Seconds per phase (Refer: PHASES), `None` for phases not measured
+            - status_code (int): Response status code, `None` if the request failed without response
+        """
+        parts = urlsplit(url)
+        key = (method.upper(), parts.netloc.lower(), endpoint_template(url))
+        with self._lock:
+            metrics = self._endpoints.get(key)
+            if metrics is None:
+                metrics = self._endpoints[key] = EndpointMetrics(*key)
+            metrics.record(timings, status_code)
+            scopes = list(self._scopes)
+        for scope in scopes:
+            scope.record(method, url, timings, status_code)
+
+    def open_scope(self):
+        scope = MetricsRegistry()
+        with self._lock:
+            self._scopes.append(scope)
+        return scope
+
+    def close_scope(self, scope):
+        with self._lock:
+            if scope in self._scopes:
+                self._scopes.remove(scope)
+        return scope
+
+    def to_json(self):
+        """
+        Returns list of per endpoint dicts with request and error counts and phase percentiles (ms)
+        """
+        with self._lock:
+            return [self._endpoints[key].to_dict() for key in sorted(self._endpoints)]
+
+    def to_prometheus(self):
+        """
+        Returns metrics in Prometheus text exposition format
+        """
+        lines = ['# HELP restgeneric_requests_total Requests sent by RestGeneric keywords',
+                 '# TYPE restgeneric_requests_total counter']
+        phase_lines = ['# HELP restgeneric_request_phase_seconds Request latency per phase',
+                       '# TYPE restgeneric_request_phase_seconds summary']
+        error_lines = ['# HELP restgeneric_request_errors_total Requests failed without response',
+                       '# TYPE restgeneric_request_errors_total counter']
+        with self._lock:
+            endpoints = [self._endpoints[key] for key in sorted(self._endpoints)]
+            for metrics in endpoints:
+                labels = 'method="{}",host="{}",endpoint="{}"'.format(
+                    _label_value(metrics.method), _label_value(metrics.host), _label_value(metrics.endpoint))
+                for code, count in sorted(metrics.status_codes.items()):
+                    lines.append('restgeneric_requests_total{{{},status="{}"}} {}'.format(labels, code, count))
+                error_lines.append('restgeneric_request_errors_total{{{}}} {}'.format(labels, metrics.errors))
+                for phase in PHASES:
+                    histogram = metrics.histograms[phase]
+                    if not histogram.total_count:
+                        continue
+                    phase_labels = '{},phase="{}"'.format(labels, phase)
+                    for percent in PERCENTILES:
+                        phase_lines.append('restgeneric_request_phase_seconds{{{},quantile="{}"}} {:.6f}'.format(
+                            phase_labels, percent / 100.0, histogram.percentile(percent)))
+                    phase_lines.append('restgeneric_request_phase_seconds_sum{{{}}} {:.6f}'.format(
+                        phase_labels, histogram.sum / 1e6))
+                    phase_lines.append('restgeneric_request_phase_seconds_count{{{}}} {}'.format(
+                        phase_labels, histogram.total_count))
+        return '\n'.join(lines + error_lines + phase_lines) + '\n'
+
+    def write(self, path, output_format='json'):
+        """
+        Writes metrics to `path` as `json` or `prometheus` text
+        """
+        if output_format == 'prometheus':
+            content = self.to_prometheus()
+        elif output_format == 'json':
+            content = json.dumps(self.to_json(), indent=2)
+        else:
+            raise ValueError('Unknown metrics format: {}, use json or prometheus'.format(output_format))
+        with open(path, 'w') as metrics_file:
+            metrics_file.write(content)
+        return path
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+
+    def __len__(self):
+        return len(self._endpoints)
+
+
+def timed_request(method, url, send, streamed=False):
+    """
+    Calls `send()` with connection phase timing enabled and records the request in `registry`
+
+    The breakdown of the last request of the current thread is available from `last_timings`.
+    Download time of `streamed` responses is not measured since the body is read by the caller.
+    """
+    phases = _local.phases = {'dns': 0.0, 'connect': 0.0, 'tls': 0.0}
+    started = time.perf_counter()
+    try:
+        response = send()
+    except Exception:
+        timings = dict.fromkeys(PHASES)
+        timings['total'] = time.perf_counter() - started
+        _local.phases, _local.last = None, timings
+        registry.record(method, url, timings, None)
+        raise
+    total = time.perf_counter() - started
+    _local.phases = None
+    elapsed = response.elapsed.total_seconds()
+    connection_time = phases['dns'] + phases['connect'] + phases['tls']
+    timings = dict(phases, ttfb=max(0.0, elapsed - connection_time),
+                   download=None if streamed else max(0.0, total - elapsed),
+                   total=elapsed if streamed else total)
+    _local.last = timings
+    registry.record(method, url, timings, response.status_code)
+    return response
+
+
+def last_timings():
+    """
+    Returns phase timings (seconds) of the last request sent by the current thread, `None` if none
+    """
+    return getattr(_local, 'last', None)
+
+
+registry = MetricsRegistry()
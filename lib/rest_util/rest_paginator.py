@@ -0,0 +1,84 @@
+"""
+Concurrent prefetching iteration over paginated list endpoints.
+
+List endpoints return one page per request with the page count in the response, e.g. gorest:
+    {"code": 200, "meta": {"pagination": {"total": 250, "pages": 13, "page": 1, "limit": 20}}, "data": [...]}
+
+The first page is fetched to discover the page count, the remaining pages are fetched by a thread
+pool keeping at most `window` requests in flight. Items are yielded in page order as soon as the
+next page has arrived, so consumers start working while later pages are still downloading.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import rest_json_path
+
+DEFAULT_WINDOW = 4
+DEFAULT_ITEMS_KEY_PATH = 'data'
+DEFAULT_PAGES_KEY_PATH = 'meta.pagination.pages'
+
+
+class PageFetchError(Exception):
+    pass
+
+
+def page_url(url, page, page_param='page'):
+    """
+    Returns `url` with query parameter `page_param` set to `page`
+    """
+    parts = urlsplit(url)
+    query = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True) if name != page_param]
+    query.append((page_param, str(page)))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), parts.fragment))
+
+
+def _items(page, items_key_path):
+    items = rest_json_path.get_value(page, items_key_path) if items_key_path else page
+    if not isinstance(items, list):
+        raise PageFetchError('No list found at "{}" of page: {}'.format(items_key_path, str(page)[:200]))
+    return items
+
+
+def iterate_pages(fetch, url, window=DEFAULT_WINDOW, items_key_path=DEFAULT_ITEMS_KEY_PATH,
+                  pages_key_path=DEFAULT_PAGES_KEY_PATH, page_param='page', max_pages=0):
+    """
+    Lazily yields items of all pages of `url`
+
+    Parameters:
+        - fetch (callable): fetch(url) returns the decoded JSON page, raises on failure
+        - url (str): URL of the list endpoint, an existing page parameter is replaced
+        - window (int): Maximum number of pages fetched concurrently ahead of the consumer
+        - items_key_path (str): Key path of the item list in a page
+        - pages_key_path (str): Key path of the page count in the first page, one page if missing
+        - page_param (str): Name of the page query parameter
+        - max_pages (int): Stop after this many pages, 0 fetches all pages
+    """
+    first = fetch(page_url(url, 1, page_param))
+    try:
+        # A missing or null page count (eg. "meta": null) means a single page
+        pages = rest_json_path.get_value(first, pages_key_path) if pages_key_path else 1
+        pages = max(1, int(pages))
+    except (TypeError, ValueError, IndexError):
+        pages = 1
+    if int(max_pages) > 0:
+        pages = min(pages, int(max_pages))
+    for item in _items(first, items_key_path):
+        yield item
+    if pages == 1:
+        return
+
+    window = max(1, int(window))
+    executor = ThreadPoolExecutor(max_workers=min(window, pages - 1))
+    in_flight = {}
+    next_page = 2
+    try:
+        for page in range(2, pages + 1):
+            while next_page <= pages and len(in_flight) < window:
+                in_flight[next_page] = executor.submit(fetch, page_url(url, next_page, page_param))
+                next_page += 1
+            for item in _items(in_flight.pop(page).result(), items_key_path):
+                yield item
+    finally:
+        for future in in_flight.values():
+            future.cancel()
+        executor.shutdown(wait=True)
@@ -0,0 +1,139 @@
+"""
+Sharded parallel execution of data driven REST test cases.
+
+Test cases ({TC_ID: url}, eg. from RestGeneric.generate_rest_urls_from_excel) are split
+deterministically into shards by a hash of their TC_ID and every shard is executed by a separate
+worker process. Each worker keeps its own pooled HTTP sessions (Refer: rest_session). Per row
+results and timings are merged back in the original test case order.
+
+Can also be run from command line, e.g.
+    python lib/rest_util/rest_runner.py --base-url https://host/api/ --excel data.xlsx --sheet Users --workers 32
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import zlib
+
+_MODULE_DIR = os.path.abspath(os.path.dirname(__file__))
+# More shards than workers keeps workers busy when hashing spreads rows unevenly
+SHARDS_PER_WORKER = 4
+
+
+def shard_index(tc_id, shard_count):
+    """
+    Returns shard (0 .. shard_count - 1) of `tc_id`, stable across runs and machines
+    """
+    return zlib.crc32(str(tc_id).encode('utf-8')) % int(shard_count)
+
+
+def split_into_shards(test_cases, shard_count):
+    """
+    Splits (tc_id, url) pairs into `shard_count` lists, keeping the original order inside each shard
+    """
+    shards = [[] for _ in range(int(shard_count))]
+    for position, (tc_id, url) in enumerate(test_cases):
+        shards[shard_index(tc_id, shard_count)].append((position, tc_id, url))
+    return shards
+
+
+def _run_shard(shard, request_options):
+    from RestGeneric import RestGeneric
+
+    results = []
+    worker = os.getpid()
+    keep_content = request_options.pop('keep_content', False)
+    for position, tc_id, url in shard:
+        spec = dict(request_options, url=url)
+        started = time.perf_counter()
+        try:
+            content, status_code = RestGeneric._execute_request_spec(spec)[:2]
+            error = None
+        except Exception as e:
+            content, status_code, error = None, None, str(e)
+        results.append((position, {
+            'tc_id': tc_id,
+            'url': url,
+            'status_code': status_code,
+            'elapsed': round(time.perf_counter() - started, 6),
+            'error': error,
+            'worker': worker,
+            'content': content if keep_content else None,
+        }))
+    return results
+
+
+def run_sharded(urls, workers=None, method='GET', headers=None, authorization_key=None, auth_key_name=None,
+                keep_content=False):
+    """
+    Executes a request for every test case of `urls` ({TC_ID: url}) on a pool of worker processes
+
+    Returns:
+        - list: Result dicts (tc_id, url, status_code, elapsed, error, worker, content) in `urls` order
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    test_cases = list(urls.items())
+    if not test_cases:
+        return []
+    workers = max(1, min(int(workers or os.cpu_count() or 1), len(test_cases)))
+    request_options = {'method': method, 'headers': headers, 'authorization_key': authorization_key,
+                       'auth_key_name': auth_key_name, 'keep_content': keep_content}
+    merged = [None] * len(test_cases)
+    # Worker processes started with "spawn" need this directory to import the library
+    added_path = _MODULE_DIR not in sys.path
+    if added_path:
+        sys.path.insert(0, _MODULE_DIR)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_run_shard, shard, dict(request_options))
+                       for shard in split_into_shards(test_cases, workers * SHARDS_PER_WORKER) if shard]
+            for future in futures:
+                for position, result in future.result():
+                    merged[position] = result
+    finally:
+        if added_path:
+            sys.path.remove(_MODULE_DIR)
+    return merged
+
+
+def summarize(results):
+    elapsed = sorted(result['elapsed'] for result in results)
+    errors = sum(1 for result in results if result['error'] is not None)
+    return {
+        'test_cases': len(results),
+        'errors': errors,
+        'workers': len(set(result['worker'] for result in results)),
+        'total_request_time': round(sum(elapsed), 3),
+        'max_elapsed': elapsed[-1] if elapsed else 0.0,
+    }
+
+
+def main(argv=None):
+    from RestGeneric import RestGeneric
+
+    parser = argparse.ArgumentParser(description='Execute Excel driven REST test cases on worker processes')
+    parser.add_argument('--base-url', required=True)
+    parser.add_argument('--excel', required=True)
+    parser.add_argument('--sheet', required=True)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--method', default='GET')
+    parser.add_argument('--authorization-key', default=None)
+    parser.add_argument('--output', default=None, help='Write merged results as JSON to this file')
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    urls = RestGeneric.generate_rest_urls_from_excel(args.base_url, args.excel, args.sheet)
+    results = run_sharded(urls, args.workers, args.method, authorization_key=args.authorization_key)
+    summary = summarize(results)
+    summary['wall_time'] = round(time.perf_counter() - started, 3)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump({'summary': summary, 'results': results}, output, indent=2, default=str)
+    print(json.dumps(summary, indent=2))
+    return 1 if summary['errors'] else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,255 @@
+"""
+Rate limit aware request scheduling for RestGeneric request keywords.
+
+When enabled, every request sent over the network passes a per host scheduler:
+    - a token bucket limits the request rate (optional), a Retry-After answer pauses the whole host
+    - an AIMD limiter bounds the requests in flight: the limit grows by one per round of successful
+      requests and is halved (at most once per round) on 429/503 answers, connection errors or
+      latency above `latency_tolerance` times the observed baseline latency
+    - 429 and 503 answers are retried for every method, connection errors for idempotent methods
+      only, after the Retry-After delay or a full jitter exponential backoff
+
+Single requests, Execute Requests Concurrently, Iterate All Pages and load tests share the same
+per host state, so parallel keywords together stay within what the server accepts.
+"""
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from requests.exceptions import ConnectionError, Timeout
+
+RETRY_STATUS_CODES = (429, 503)
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+
+
+def retry_after_seconds(response):
+    """
+    Returns delay requested by Retry-After header of `response` in seconds, `None` if not present
+    """
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket(object):
+    """
+    Thread safe token bucket allowing `rate` requests per second with bursts of `burst` requests
+
+    A `rate` of 0 does not limit the rate, but the bucket can still be paused.
+    """
+
+    def __init__(self, rate=0, burst=0):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(burst or self.rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until a request may be sent
+
+        Returns:
+            - float: Seconds waited
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif not self.rate:
+                    return waited
+                else:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return waited
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def pause(self, seconds):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class AimdLimiter(object):
+    """
+    Concurrency limit with additive increase and multiplicative decrease
+
+    Parameters:
+        - initial, minimum, maximum (int): Initial, lowest and highest number of requests in flight
+        - decrease_ratio (float): Factor applied to the limit on congestion
+        - latency_tolerance (float): Latency above this multiple of the baseline counts as congestion,
+            0 reacts to errors only
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=32, decrease_ratio=0.5, latency_tolerance=3.0):
+        self.minimum = max(1, int(minimum))
+        self.maximum = max(self.minimum, int(maximum))
+        self.limit = float(min(max(int(initial), self.minimum), self.maximum))
+        self.decrease_ratio = float(decrease_ratio)
+        self.latency_tolerance = float(latency_tolerance)
+        self.in_flight = 0
+        self.decreases = 0
+        self.baseline_latency = None
+        self._since_decrease = self.limit
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self, latency, overloaded):
+        with self._condition:
+            self.in_flight -= 1
+            congested = overloaded
+            if latency is not None and not overloaded:
+                if self.baseline_latency is None or latency < self.baseline_latency:
+                    self.baseline_latency = latency
+                else:
+                    # Let the baseline follow a lasting latency change slowly
+                    self.baseline_latency += (latency - self.baseline_latency) * 0.05
+                congested = bool(self.latency_tolerance) and latency > self.baseline_latency * self.latency_tolerance
+            self._since_decrease += 1
+            if congested:
+                if self._since_decrease >= self.limit:
+                    self.limit = max(float(self.minimum), self.limit * self.decrease_ratio)
+                    self._since_decrease = 0
+                    self.decreases += 1
+            else:
+                self.limit = min(float(self.maximum), self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+
+class _HostState(object):
+    __slots__ = ('bucket', 'limiter', 'requests', 'retries', 'throttled', 'errors')
+
+    def __init__(self, bucket, limiter):
+        self.bucket = bucket
+        self.limiter = limiter
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        self.errors = 0
+
+
+class RequestScheduler(object):
+    """
+    Per host rate limiting, adaptive concurrency and retries (Refer: module documentation)
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.configure()
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def configure(self, rate=0, burst=0, max_retries=3, backoff_base=0.5, backoff_max=30.0, max_retry_after=60.0,
+                  initial_concurrency=4, min_concurrency=1, max_concurrency=32, latency_tolerance=3.0):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.max_retries = int(max_retries)
+        self.backoff_base = float(backoff_base)
+        self.backoff_max = float(backoff_max)
+        self.max_retry_after = float(max_retry_after)
+        self.initial_concurrency = int(initial_concurrency)
+        self.min_concurrency = int(min_concurrency)
+        self.max_concurrency = int(max_concurrency)
+        self.latency_tolerance = float(latency_tolerance)
+        self.reset()
+
+    def reset(self):
+        self._hosts = {}
+
+    def _host(self, url):
+        parts = urlsplit(url)
+        key = '{}://{}'.format(parts.scheme.lower(), parts.netloc.lower())
+        with self._lock:
+            state = self._hosts.get(key)
+            if state is None:
+                state = self._hosts[key] = _HostState(
+                    TokenBucket(self.rate, self.burst),
+                    AimdLimiter(self.initial_concurrency, self.min_concurrency, self.max_concurrency,
+                                latency_tolerance=self.latency_tolerance))
+            return state
+
+    def backoff(self, attempt):
+        """
+        Returns full jitter exponential backoff delay before retry number `attempt` (0 based)
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def execute(self, method, url, send):
+        """
+        Calls `send()` when the host scheduler allows it, retrying throttled and failed requests
+
+        Returns:
+            - response: Last response, a throttled response is returned once retries are exhausted
+        """
+        state = self._host(url)
+        attempt = 0
+        while True:
+            state.bucket.acquire()
+            state.limiter.acquire()
+            started = time.monotonic()
+            response = error = None
+            try:
+                response = send()
+            except (ConnectionError, Timeout) as e:
+                error = e
+            finally:
+                throttled = response is not None and response.status_code in RETRY_STATUS_CODES
+                state.limiter.release(time.monotonic() - started if response is not None else None,
+                                      throttled or response is None)
+            state.requests += 1
+            if error is not None:
+                state.errors += 1
+                if method.upper() not in IDEMPOTENT_METHODS or attempt >= self.max_retries:
+                    raise error
+                delay = self.backoff(attempt)
+            elif not throttled:
+                return response
+            else:
+                state.throttled += 1
+                if attempt >= self.max_retries:
+                    return response
+                delay = retry_after_seconds(response)
+                if delay is None:
+                    delay = self.backoff(attempt)
+                else:
+                    delay = min(delay, self.max_retry_after)
+                    state.bucket.pause(delay)
+                response.close()
+            state.retries += 1
+            attempt += 1
+            time.sleep(delay)
+
+    def stats(self):
+        """
+        Returns {host: {requests, retries, throttled, errors, concurrency_limit, in_flight}}
+        """
+        with self._lock:
+            hosts = dict(self._hosts)
+        return {host: {'requests': state.requests, 'retries': state.retries, 'throttled': state.throttled,
+                       'errors': state.errors, 'concurrency_limit': int(state.limiter.limit),
+                       'in_flight': state.limiter.in_flight}
+                for host, state in sorted(hosts.items())}
+
+
+scheduler = RequestScheduler()
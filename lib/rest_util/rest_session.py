@@ -0,0 +1,161 @@
+"""
+Per-host pooled HTTP session registry used by the RestGeneric request keywords.
+
+Every scheme://host:port gets one `requests.Session` with its own connection pool,
+so consecutive requests to the same API reuse keep-alive connections instead of
+paying TCP and TLS setup on every call.
+"""
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+from rest_metrics import TimedHTTPAdapter
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_IDLE_TIMEOUT = 300
+
+
+class _PooledSession(object):
+    __slots__ = ('session', 'pool_connections', 'pool_maxsize', 'idle_timeout', 'last_used')
+
+    def __init__(self, session, pool_connections, pool_maxsize, idle_timeout):
+        self.session = session
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.idle_timeout = idle_timeout
+        self.last_used = time.monotonic()
+
+    def is_idle(self, now):
+        return self.idle_timeout > 0 and now - self.last_used > self.idle_timeout
+
+
+class SessionRegistry(object):
+    """
+    Thread safe registry of `requests.Session` objects keyed by host
+
+    Sessions are created on first use with the registry defaults, or explicitly through
+    `open` with a custom pool size. A session that has not been used for `idle_timeout`
+    seconds is closed and replaced on next use, since the server has most likely dropped
+    its keep-alive connections by then.
+    """
+
+    def __init__(self, pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                 idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.idle_timeout = idle_timeout
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_key(url):
+        """
+        Returns registry key (scheme://host:port) for `url`
+        """
+        parts = urlsplit(url)
+        return '{scheme}://{netloc}'.format(scheme=parts.scheme.lower(), netloc=parts.netloc.lower())
+
+    @staticmethod
+    def _create_session(pool_connections, pool_maxsize):
+        session = requests.Session()
+        session.verify = False
+        adapter = TimedHTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def open(self, url, pool_connections=None, pool_maxsize=None, idle_timeout=None):
+        """
+        Opens (or re-opens) a pooled session for host of `url`
+
+        Parameters:
+            - url (str): Any URL on the host, usually the base URL
+            - pool_connections (int): Number of connection pools to cache
+            - pool_maxsize (int): Maximum number of connections kept per host
+            - idle_timeout (int): Seconds after which an unused session is recycled (0 disables)
+
+        Returns:
+            - str: Registry key of the opened session
+        """
+        key = self.host_key(url)
+        pool_connections = int(pool_connections or self.pool_connections)
+        pool_maxsize = int(pool_maxsize or self.pool_maxsize)
+        pooled = _PooledSession(self._create_session(pool_connections, pool_maxsize), pool_connections,
+                                pool_maxsize, float(self.idle_timeout if idle_timeout is None else idle_timeout))
+        with self._lock:
+            previous = self._sessions.pop(key, None)
+            self._sessions[key] = pooled
+        if previous is not None:
+            previous.session.close()
+        return key
+
+    def get(self, url):
+        """
+        Returns pooled session for host of `url`, creating it with registry defaults if needed
+
+        An idle session is replaced by one with the same pool sizes and idle timeout.
+        """
+        key = self.host_key(url)
+        now = time.monotonic()
+        stale = None
+        with self._lock:
+            pooled = self._sessions.get(key)
+            if pooled is not None and pooled.is_idle(now):
+                stale = pooled
+                pooled = _PooledSession(self._create_session(stale.pool_connections, stale.pool_maxsize),
+                                        stale.pool_connections, stale.pool_maxsize, stale.idle_timeout)
+                self._sessions[key] = pooled
+            elif pooled is None:
+                pooled = _PooledSession(self._create_session(self.pool_connections, self.pool_maxsize),
+                                        self.pool_connections, self.pool_maxsize, float(self.idle_timeout))
+                self._sessions[key] = pooled
+            pooled.last_used = now
+        if stale is not None:
+            stale.session.close()
+        return pooled.session
+
+    def close(self, url):
+        """
+        Closes pooled session for host of `url`
+
+        Returns:
+            - bool: `True` if a session was open for the host, `False` otherwise
+        """
+        with self._lock:
+            pooled = self._sessions.pop(self.host_key(url), None)
+        if pooled is None:
+            return False
+        pooled.session.close()
+        return True
+
+    def close_all(self):
+        """
+        Closes all pooled sessions
+
+        Returns:
+            - int: Number of sessions closed
+        """
+        with self._lock:
+            sessions, self._sessions = list(self._sessions.values()), {}
+        for pooled in sessions:
+            pooled.session.close()
+        return len(sessions)
+
+    def reset_after_fork(self):
+        # Connections inherited from the parent process are still used by it, forget them without closing
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def keys(self):
+        with self._lock:
+            return sorted(self._sessions)
+
+
+registry = SessionRegistry()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=registry.reset_after_fork)
@@ -0,0 +1,115 @@
+"""
+In-process HTTP stub server for load checks and benchmarks of RestGeneric keywords.
+
+Serves canned responses over HTTP/1.1 keep-alive from a background thread, so load and
+capacity checks can run in the same suite as the functional scenarios without a live API.
+"""
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+DEFAULT_BODY = b'{"code": 200, "meta": null, "data": {}}'
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def _respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        request_body = self.rfile.read(length) if length else b''
+        stub = self.server.stub
+        path = self.path.split('?', 1)[0]
+        status, body, headers = stub.routes.get((self.command, path), stub.default_response)
+        if body is None:
+            body = request_body
+        stub.record_hit()
+        if stub.delay:
+            time.sleep(stub.delay)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_HEAD = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+class _ThreadingServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def handle_error(self, request, client_address):
+        # Clients dropping keep-alive connections (eg. after reading part of a streamed body) are expected
+        if not isinstance(sys.exc_info()[1], (ConnectionError, socket.timeout)):
+            HTTPServer.handle_error(self, request, client_address)
+
+
+def _to_bytes(body):
+    if body is None or isinstance(body, bytes):
+        return body
+    return str(body).encode('utf-8')
+
+
+class StubServer(object):
+    """
+    Minimal threaded HTTP server answering every request with a canned response
+
+    Parameters:
+        - body (str|bytes): Default response body, `None` echoes the request body
+        - status (int): Default response status code
+        - port (int): Port to listen on, 0 picks a free port
+        - delay (float): Seconds to sleep before answering, to simulate server latency
+    """
+
+    def __init__(self, body=DEFAULT_BODY, status=200, port=0, delay=0.0, host='127.0.0.1'):
+        self.default_response = (int(status), _to_bytes(body), {})
+        self.routes = {}
+        self.delay = float(delay)
+        self.hits = 0
+        self._hits_lock = threading.Lock()
+        self._server = _ThreadingServer((host, int(port)), _StubHandler)
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return 'http://{host}:{port}/'.format(host=host, port=port)
+
+    def add_route(self, method, path, body=DEFAULT_BODY, status=200, headers=None):
+        """
+        Registers a canned response for `method` and `path` (query string is ignored)
+        """
+        if not path.startswith('/'):
+            path = '/' + path
+        self.routes[(method.upper(), path)] = (int(status), _to_bytes(body), dict(headers or {}))
+
+    def record_hit(self):
+        with self._hits_lock:
+            self.hits += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='rest-stub-server')
+        self._thread.daemon = True
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+active_servers = {}